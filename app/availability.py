@@ -0,0 +1,107 @@
+"""In-memory availability engine built from a single calendar fetch."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # numpy is only imported by the vectorized searches, to keep it off the startup path
+    import numpy as np
+
+from app.calendar import event_bounds, get_events
+import logging
+from app.settings import settings
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[datetime, datetime]
+
+
+def events_to_intervals(events: Iterable[dict]) -> List[Interval]:
+    """Convert Google Calendar event resources into (start, end) busy intervals."""
+    intervals = []
+    for event in events:
+        if event.get("status") == "cancelled":
+            continue
+        bounds = event_bounds(event)
+        if bounds is not None:
+            intervals.append(bounds)
+    return intervals
+
+
+class AvailabilityIndex:
+    """
+    Sorted, merged index of busy intervals for a time window.
+    Answers slot checks with a binary search instead of a calendar request.
+    """
+    def __init__(self, window_start: datetime, window_end: datetime, busy: Iterable[Interval] = ()) -> None:
+        self.window_start = window_start
+        self.window_end = window_end
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        self._arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._merge(busy)
+
+    def _merge(self, busy: Iterable[Interval]) -> None:
+        intervals = sorted([*zip(self._starts, self._ends), *busy])
+        self._starts, self._ends = [], []
+        for start, end in intervals:
+            if self._ends and start <= self._ends[-1]:
+                # Overlapping or touching block, extend the previous one
+                if end > self._ends[-1]:
+                    self._ends[-1] = end
+                continue
+            self._starts.append(start)
+            self._ends.append(end)
+        self._arrays = None
+
+    @classmethod
+    def fetch(cls, window_start: datetime, window_end: datetime) -> "AvailabilityIndex":
+        """Build an index with one calendar request covering the whole window."""
+        events = get_events(window_start, window_end)
+        index = cls(window_start, window_end, events_to_intervals(events))
+        logger.info(f"Built availability index from {window_start} to {window_end} with {len(index)} busy blocks")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        # True when the interval lies inside the fetched window
+        return self.window_start <= start and end <= self.window_end
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """Return True when [start, end) does not overlap any busy block."""
+        # Blocks are disjoint and sorted, so only the last block starting before `end` can overlap
+        position = bisect_left(self._starts, end)
+        if position == 0:
+            return True
+        return self._ends[position - 1] <= start
+
+    def add_busy(self, start: datetime, end: datetime) -> None:
+        """Mark an interval as busy, e.g. right after an event is created."""
+        self._merge([(start, end)])
+
+    def as_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Busy block starts and ends as sorted arrays of epoch seconds."""
+        import numpy as np
+        if self._arrays is None:
+            self._arrays = (
+                np.array([start.timestamp() for start in self._starts], dtype=np.float64),
+                np.array([end.timestamp() for end in self._ends], dtype=np.float64),
+            )
+        return self._arrays
+
+    def free_mask(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Vectorized is_free: a boolean per [start, end) pair of epoch-second arrays."""
+        import numpy as np
+        busy_starts, busy_ends = self.as_arrays()
+        if len(busy_starts) == 0:
+            return np.ones(len(starts), dtype=bool)
+        # Same rule as is_free, for every candidate at once
+        positions = np.searchsorted(busy_starts, ends, side="left")
+        previous_ends = busy_ends[np.maximum(positions - 1, 0)]
+        return (positions == 0) | (previous_ends <= starts)
@@ -1,56 +1,472 @@
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import partial
+from app.providers import Provider
+from app.resilience import CircuitBreaker, backoff_delay, call_hedged, call_with_retry
 from app.settings import settings
+from app.telemetry import CALENDAR_CACHE, CALENDAR_REQUESTS, RETRIES, span
+import asyncio
+import contextvars
 import logging
-from typing import List, Optional
+import socket
+import threading
+import time
+import uuid
+import weakref
+import pendulum
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
-credentials = service_account.Credentials.from_service_account_file(
-    settings.GOOGLE_CREDENTIALS_FILE, scopes=settings.SCOPES
-)
-service = build("calendar", "v3", credentials=credentials)
+def _load_credentials():
+    # The Google auth stack is imported on first use so importing this module stays cheap
+    from google.oauth2 import service_account
+    return service_account.Credentials.from_service_account_file(
+        settings.GOOGLE_CREDENTIALS_FILE, scopes=settings.SCOPES
+    )
 
-def get_events(start_time: datetime, end_time: datetime) -> List[dict]:
+
+credentials = Provider("calendar credentials", _load_credentials)
+_local = threading.local()
+calendar_breaker = CircuitBreaker("calendar", settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+# Duplicate reads started by hedging run here, never on the pool their caller occupies
+_hedge_executor = ThreadPoolExecutor(max_workers=settings.CALENDAR_MAX_CONCURRENCY, thread_name_prefix="calendar-hedge")
+# Throttling and server-side errors that are worth another attempt
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CalendarError(RuntimeError):
+    """A Calendar request failed after retries or was refused by the circuit breaker; never an empty calendar."""
+
+
+def _is_retryable(error: BaseException) -> bool:
+    import httplib2
+    from googleapiclient.errors import HttpError
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        # Google reports quota errors as 403 with a rateLimitExceeded reason
+        return status in RETRYABLE_STATUSES or (status == 403 and b"ratelimitexceeded" in (error.content or b"").lower())
+    # Only transport failures; other OSErrors (e.g. a missing credentials file) will not fix themselves
+    return isinstance(error, (TimeoutError, ConnectionError, socket.timeout, socket.gaierror, httplib2.HttpLib2Error))
+
+
+def _is_conflict(error: BaseException) -> bool:
+    from googleapiclient.errors import HttpError
+    return isinstance(error, HttpError) and error.resp.status == 409
+
+
+def _get_service():
+    # httplib2 connections are not thread-safe, so every worker thread keeps its own client
+    client = getattr(_local, "service", None)
+    if client is None:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.discovery import build
+        http = AuthorizedHttp(credentials.get(), http=httplib2.Http(timeout=settings.CALENDAR_TIMEOUT))
+        client = build("calendar", "v3", http=http, cache_discovery=False)
+        _local.service = client
+    return client
+
+
+def _parse_event_time(value: dict) -> Optional[datetime]:
+    # Google returns either a dateTime (timed events) or a date (all-day events)
+    raw = value.get("dateTime") or value.get("date")
+    if not raw:
+        return None
+    return pendulum.parse(raw, tz=value.get("timeZone") or settings.TIMEZONE)
+
+
+def event_bounds(event: dict) -> Optional[Tuple[datetime, datetime]]:
+    """Return the (start, end) of a Google Calendar event resource, or None if it has no times."""
+    start = _parse_event_time(event.get("start", {}))
+    end = _parse_event_time(event.get("end", {}))
+    if start is None or end is None:
+        return None
+    return start, end
+
+
+def _overlaps(event: dict, start_time: datetime, end_time: datetime) -> bool:
+    bounds = event_bounds(event)
+    return bounds is not None and bounds[0] < end_time and bounds[1] > start_time
+
+
+class EventWindowCache:
+    """
+    LRU cache of fetched calendar windows with TTL expiry.
+    Windows are patched on writes and can be refreshed from incremental sync results.
+    Every window keeps the sync token of the fetch it came from, so it only takes changes made since then.
+    """
+    def __init__(self, ttl_seconds: float, max_windows: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_windows = max_windows
+        # (start, end) -> [start, end, events, fetched_at, sync_token]
+        self._windows: "OrderedDict[Tuple[datetime, datetime], list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.incremental_refreshes = 0
+
+    def _is_fresh(self, entry: list) -> bool:
+        return time.monotonic() - entry[3] < self.ttl_seconds
+
+    def get(self, start_time: datetime, end_time: datetime) -> Optional[List[dict]]:
+        """Return cached events for the window, served from any fresh window covering it."""
+        with self._lock:
+            key = (start_time, end_time)
+            entry = self._windows.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._windows.move_to_end(key)
+                self.hits += 1
+                return list(entry[2])
+            for key, entry in reversed(self._windows.items()):
+                if entry[0] <= start_time and end_time <= entry[1] and self._is_fresh(entry):
+                    self._windows.move_to_end(key)
+                    self.hits += 1
+                    return [event for event in entry[2] if _overlaps(event, start_time, end_time)]
+            self.misses += 1
+            return None
+
+    def sync_token_for(self, start_time: datetime, end_time: datetime) -> Optional[str]:
+        # Sync token of the most recent (possibly expired) window covering the range
+        with self._lock:
+            for entry in reversed(self._windows.values()):
+                if entry[0] <= start_time and end_time <= entry[1] and entry[4]:
+                    return entry[4]
+            return None
+
+    def put(self, start_time: datetime, end_time: datetime, events: List[dict], sync_token: Optional[str] = None) -> None:
+        with self._lock:
+            key = (start_time, end_time)
+            self._windows[key] = [start_time, end_time, list(events), time.monotonic(), sync_token]
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+                self.evictions += 1
+
+    def add_event(self, event: dict) -> None:
+        """Patch every cached window the new event falls into."""
+        bounds = event_bounds(event)
+        with self._lock:
+            for entry in self._windows.values():
+                if bounds is None:
+                    # Unknown times: expire the window so it is refetched
+                    entry[3] = float("-inf")
+                elif bounds[0] < entry[1] and bounds[1] > entry[0]:
+                    entry[2].append(event)
+
+    def invalidate(self, start_time: datetime, end_time: datetime) -> None:
+        """Drop every cached window overlapping the range."""
+        with self._lock:
+            stale = [key for key, entry in self._windows.items() if entry[0] < end_time and entry[1] > start_time]
+            for key in stale:
+                del self._windows[key]
+            self.invalidations += len(stale)
+
+    def apply_changes(self, changes: List[dict], sync_token: str, next_sync_token: Optional[str]) -> None:
+        """
+        Merge the changes made since sync_token into the windows fetched under that token and mark them fresh.
+        Windows holding other tokens are left alone, since these changes may not cover theirs.
+        """
+        with self._lock:
+            changed_ids = {event.get("id") for event in changes}
+            now = time.monotonic()
+            for entry in self._windows.values():
+                if entry[4] != sync_token:
+                    continue
+                events = [event for event in entry[2] if event.get("id") not in changed_ids]
+                events.extend(
+                    event for event in changes
+                    if event.get("status") != "cancelled" and _overlaps(event, entry[0], entry[1])
+                )
+                entry[2] = events
+                entry[3] = now
+                entry[4] = next_sync_token
+            self.incremental_refreshes += 1
+
+    def forget_sync_token(self, sync_token: str) -> None:
+        # An expired token cannot be synced from again; its windows wait for a full fetch
+        with self._lock:
+            for entry in self._windows.values():
+                if entry[4] == sync_token:
+                    entry[4] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "windows": len(self._windows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "incremental_refreshes": self.incremental_refreshes,
+            }
+
+
+event_cache = EventWindowCache(settings.CALENDAR_CACHE_TTL, settings.CALENDAR_CACHE_SIZE)
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Return hit/miss/eviction counters of the calendar event cache."""
+    return event_cache.stats()
+
+
+def _list_events(**params) -> Tuple[List[dict], Optional[str]]:
+    # Follow pagination and return all items plus the sync token of the last page
+    events = []
+    page_token = None
+    operation = "sync" if "syncToken" in params else "list"
+    while True:
+        request = partial(_request_page, operation, page_token, params)
+        # Reads are idempotent, so a slow page may be hedged and a failed one retried
+        events_result = call_with_retry(
+            lambda: call_hedged(request, f"calendar.{operation}", settings.CALENDAR_HEDGE_DELAY, _hedge_executor),
+            f"calendar.{operation}", _is_retryable, settings.CALENDAR_MAX_ATTEMPTS, calendar_breaker,
+        )
+        events.extend(events_result.get("items", []))
+        page_token = events_result.get("nextPageToken")
+        if not page_token:
+            return events, events_result.get("nextSyncToken")
+
+
+def _request_page(operation: str, page_token: Optional[str], params: Dict[str, Any]) -> dict:
     try:
-        logger.info(f"Fetching events from {start_time} to {end_time}")
-        events_result = (
-            service.events()
-            .list(
-                calendarId=settings.GOOGLE_CALENDAR_ID,
-                timeMin=start_time.isoformat(),
-                timeMax=end_time.isoformat(),
-                singleEvents=True,
-                orderBy="startTime",
-            )
+        result = (
+            _get_service().events()
+            .list(calendarId=settings.GOOGLE_CALENDAR_ID, singleEvents=True, pageToken=page_token, **params)
             .execute()
         )
-        return events_result.get("items", [])
-    except Exception as e:
-        logger.error(f"Erro ao buscar eventos do Google Calendar: {e}")
-        return []
+    except Exception:
+        CALENDAR_REQUESTS.inc(operation=operation, status="error")
+        raise
+    CALENDAR_REQUESTS.inc(operation=operation, status="ok")
+    return result
+
+
+def _sync_incrementally(sync_token: str) -> bool:
+    # Pull only the events changed since sync_token into the windows fetched under it
+    from googleapiclient.errors import HttpError
+    try:
+        changes, next_sync_token = _list_events(syncToken=sync_token)
+    except HttpError as e:
+        if e.resp.status == 410:
+            logger.info("Calendar sync token expired, falling back to a full fetch")
+            event_cache.forget_sync_token(sync_token)
+            return False
+        raise
+    logger.info(f"Incremental calendar sync returned {len(changes)} changed events")
+    event_cache.apply_changes(changes, sync_token, next_sync_token)
+    return True
+
+
+def get_events(start_time: datetime, end_time: datetime) -> List[dict]:
+    """Events overlapping the window, from the cache or Google. Raises CalendarError when Google cannot be reached."""
+    with span("calendar.get_events", window_start=start_time.isoformat(), window_end=end_time.isoformat()) as current:
+        cached = event_cache.get(start_time, end_time)
+        if cached is not None:
+            logger.debug(f"Calendar cache hit for {start_time} to {end_time}")
+            CALENDAR_CACHE.inc(result="hit")
+            current.set_attributes(cache="hit", events=len(cached))
+            return cached
+        CALENDAR_CACHE.inc(result="miss")
+        current.set_attribute("cache", "miss")
+        try:
+            sync_token = event_cache.sync_token_for(start_time, end_time) if settings.CALENDAR_INCREMENTAL_SYNC else None
+            if sync_token:
+                if _sync_incrementally(sync_token):
+                    cached = event_cache.get(start_time, end_time)
+                    if cached is not None:
+                        current.set_attributes(cache="incremental", events=len(cached))
+                        return cached
+
+            logger.info(f"Fetching events from {start_time} to {end_time}")
+            # orderBy is omitted so Google returns a sync token; callers sort by start themselves
+            events, sync_token = _list_events(timeMin=start_time.isoformat(), timeMax=end_time.isoformat())
+            event_cache.put(start_time, end_time, events, sync_token)
+            current.set_attribute("events", len(events))
+            return events
+        except Exception as e:
+            logger.error(f"Erro ao buscar eventos do Google Calendar: {e}")
+            current.record_error(e)
+            # An unreachable calendar must not look like a free one
+            raise CalendarError(f"Não foi possível consultar a agenda: {e}") from e
 
 def is_slot_available(start_time: datetime, end_time: datetime) -> bool:
     events = get_events(start_time, end_time)
     logger.info(f"Checked slot availability from {start_time} to {end_time}: {'available' if len(events) == 0 else 'not available'}")
     return len(events) == 0
 
-def create_event(user_name: str, service_name: str, professional_name: str, start_time: datetime, duration_minutes: int) -> Optional[str]:
+def _event_body(user_name: str, service_name: str, professional_name: str, start_time: datetime, duration_minutes: int) -> dict:
     end_time = start_time + timedelta(minutes=duration_minutes)
-    event = {
+    return {
         "summary": f"{user_name} - {service_name}",
         "description": f"Profissional: {professional_name}",
         "start": {"dateTime": start_time.isoformat(), "timeZone": settings.TIMEZONE},
         "end": {"dateTime": end_time.isoformat(), "timeZone": settings.TIMEZONE},
+        # Chosen here so a retried insert can be recognized as already applied
+        "id": uuid.uuid4().hex,
     }
+
+
+def create_event(user_name: str, service_name: str, professional_name: str, start_time: datetime, duration_minutes: int) -> str:
+    """Insert an event and return its id. Raises CalendarError when the insert did not happen."""
+    end_time = start_time + timedelta(minutes=duration_minutes)
+    event = _event_body(user_name, service_name, professional_name, start_time, duration_minutes)
     logger.info(f"Creating event for {user_name} - {service_name} with {professional_name} starting at {start_time} for {duration_minutes} minutes")
-    try:
-        created_event = service.events().insert(calendarId=settings.GOOGLE_CALENDAR_ID, body=event).execute()
+    attempts = 0
+
+    def insert() -> dict:
+        nonlocal attempts
+        attempts += 1
+        try:
+            created = _get_service().events().insert(calendarId=settings.GOOGLE_CALENDAR_ID, body=event).execute()
+        except Exception as e:
+            CALENDAR_REQUESTS.inc(operation="insert", status="error")
+            # The event id is ours, so a conflict on a retry means an earlier attempt went through
+            if attempts > 1 and _is_conflict(e):
+                return event
+            raise
+        CALENDAR_REQUESTS.inc(operation="insert", status="ok")
+        return created
+
+    with span("calendar.create_event", service=service_name, professional=professional_name, start=start_time.isoformat()) as current:
+        try:
+            created_event = call_with_retry(insert, "calendar.insert", _is_retryable, settings.CALENDAR_MAX_ATTEMPTS, calendar_breaker)
+        except Exception as e:
+            logger.error(f"Erro ao criar evento no Google Calendar: {e}")
+            current.record_error(e)
+            event_cache.invalidate(start_time, end_time)
+            raise CalendarError(f"Não foi possível criar o evento na agenda: {e}") from e
+        # Keep cached windows consistent with the write
+        event_cache.add_event(created_event)
+        current.set_attributes(event_id=created_event.get("id"), attempts=attempts)
         return created_event.get("id")
-    except Exception as e:
-        logger.error(f"Erro ao criar evento no Google Calendar: {e}")
-        return None
\ No newline at end of file
+
+
+# Google accepts at most 1000 calls per batch request
+MAX_BATCH_SIZE = 1000
+
+
+def create_events(appointments: List[Dict[str, Any]]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Insert several events through Calendar batch requests of at most CALENDAR_BATCH_SIZE inserts each.
+    Every appointment holds the keyword arguments of create_event.
+    Inserts that fail with a retryable error are sent again in a follow-up batch, with backoff.
+    Returns (event_id, error) per appointment, in input order; exactly one of the two is set.
+    """
+    results: List[Tuple[Optional[str], Optional[str]]] = [(None, None)] * len(appointments)
+    bodies = [_event_body(**appointment) for appointment in appointments]
+    attempts = max(settings.CALENDAR_MAX_ATTEMPTS, 1)
+    batch_size = max(1, min(settings.CALENDAR_BATCH_SIZE, MAX_BATCH_SIZE))
+
+    def fail(index: int, error: Any) -> None:
+        results[index] = (None, str(error))
+        appointment = appointments[index]
+        event_cache.invalidate(appointment["start_time"], appointment["start_time"] + timedelta(minutes=appointment["duration_minutes"]))
+
+    for offset in range(0, len(appointments), batch_size):
+        pending = list(range(offset, min(offset + batch_size, len(appointments))))
+        with span("calendar.create_events", events=len(pending)) as current:
+            for attempt in range(attempts):
+                retry: List[int] = []
+                last_attempt = attempt + 1 == attempts
+
+                def on_response(request_id: str, response: Optional[dict], exception: Optional[Exception]) -> None:
+                    index = int(request_id)
+                    if exception is None:
+                        event_cache.add_event(response)
+                        results[index] = (response.get("id"), None)
+                    elif attempt > 0 and _is_conflict(exception):
+                        # Applied by an earlier batch whose response was lost
+                        event_cache.add_event(bodies[index])
+                        results[index] = (bodies[index]["id"], None)
+                    elif _is_retryable(exception) and not last_attempt:
+                        retry.append(index)
+                    else:
+                        logger.error(f"Erro ao criar evento {index} no Google Calendar: {exception}")
+                        fail(index, exception)
+
+                logger.info(f"Creating {len(pending)} events in one batch request")
+                try:
+                    calendar_breaker.before_call()
+                    service = _get_service()
+                    batch = service.new_batch_http_request(callback=on_response)
+                    for index in pending:
+                        batch.add(service.events().insert(calendarId=settings.GOOGLE_CALENDAR_ID, body=bodies[index]), request_id=str(index))
+                    batch.execute()
+                    CALENDAR_REQUESTS.inc(operation="batch_insert", status="ok")
+                    calendar_breaker.record_success()
+                except Exception as e:
+                    logger.error(f"Erro ao criar eventos em lote no Google Calendar: {e}")
+                    CALENDAR_REQUESTS.inc(operation="batch_insert", status="error")
+                    current.record_error(e)
+                    unanswered = [index for index in pending if results[index] == (None, None) and index not in retry]
+                    if _is_retryable(e):
+                        calendar_breaker.record_failure()
+                        if not last_attempt:
+                            retry.extend(unanswered)
+                            unanswered = []
+                    # Part of the batch may have been applied, so cached windows cannot be trusted
+                    for index in unanswered:
+                        fail(index, e)
+                if not retry:
+                    break
+                delay = backoff_delay(attempt, settings.RETRY_BASE_DELAY, settings.RETRY_MAX_DELAY)
+                logger.warning(f"Retrying {len(retry)} event inserts in {delay:.2f}s")
+                RETRIES.inc(operation="calendar.batch_insert")
+                time.sleep(delay)
+                pending = retry
+            current.set_attribute("failed", sum(1 for _, error in results[offset:offset + batch_size] if error))
+    return results
+
+
+# Async client: blocking googleapiclient calls run on a bounded pool so the event loop stays free
+_executor = ThreadPoolExecutor(max_workers=settings.CALENDAR_MAX_CONCURRENCY, thread_name_prefix="calendar")
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    # One semaphore per event loop, since frontends may run several loops over time
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.CALENDAR_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+def calendar_deadline() -> float:
+    """Longest one calendar request may take with every retry: each attempt's socket timeout and hedge delay, plus the worst-case backoff."""
+    attempts = max(settings.CALENDAR_MAX_ATTEMPTS, 1)
+    backoff = sum(min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * 2 ** attempt) for attempt in range(attempts - 1))
+    return attempts * (settings.CALENDAR_TIMEOUT + max(settings.CALENDAR_HEDGE_DELAY, 0)) + backoff
+
+
+async def run_in_calendar_pool(func: Callable[..., Any], *args: Any, timeout: Optional[float] = None, write: bool = False, **kwargs: Any) -> Any:
+    """
+    Run blocking calendar code on the calendar thread pool.
+    At most CALENDAR_MAX_CONCURRENCY calls run at once; the timeout starts when the call is admitted and
+    defaults to calendar_deadline(), so retries can finish. Writes get no outer deadline: a cancelled
+    coroutine cannot stop the worker thread, and a booking must not be reported as failed while it completes.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    async with _semaphore():
+        call = loop.run_in_executor(_executor, context.run, partial(func, *args, **kwargs))
+        if write:
+            return await call
+        timeout = timeout if timeout is not None else calendar_deadline()
+        try:
+            return await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError as e:
+            raise CalendarError(f"A agenda não respondeu em {timeout:g} segundos") from e
+
@@ -1,12 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass, field, fields
-from typing import Annotated
+from typing import Annotated, Dict
 
 from langchain_core.runnables import ensure_config
 from langgraph.config import get_config
 
 from app.prompts import SYSTEM_PROMPT
-from app.services import Services
+from app.services import Services, get_services
 from app.settings import settings
 
 
@@ -29,22 +29,84 @@ class Configuration:
         },
     )
 
+    fast_model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
+        default="",
+        metadata={
+            "description": "Smaller, faster model for routine steps such as picking a single tool or "
+            "turning a tool result into a reply. Empty sends every step to model."
+        },
+    )
+
+    fast_model_max_context_tokens: int = field(
+        default=2000,
+        metadata={
+            "description": "Steps whose unsummarized history exceeds this many tokens go to the primary model."
+        },
+    )
+
+    fast_model_max_words: int = field(
+        default=30,
+        metadata={
+            "description": "User messages longer than this are treated as ambiguous and go to the primary model."
+        },
+    )
+
     llm_api_key: str = field(
         default=settings.LLM_API_KEY,
         metadata={"description": "LLM API Key for authenticating with LLM services."}
     )
 
     services: Services = field(
-        default_factory=lambda: Services(),
+        default_factory=get_services,
+        metadata={
+            "description": "Object that contains all the services available for booking. "
+            "Shared across configurations and reloaded when the services file changes."
+        }
+    )
+
+    enable_fast_path: bool = field(
+        default=False,
+        metadata={
+            "description": "Answer clear service-list and availability questions locally, "
+            "without calling the language model."
+        }
+    )
+
+    max_context_tokens: int = field(
+        default=4000,
+        metadata={
+            "description": "Token budget for the conversation history sent to the model. "
+            "Older turns beyond it are folded into a running summary."
+        }
+    )
+
+    tool_timeout: float = field(
+        default=20.0,
+        metadata={
+            "description": "Seconds a tool call may run before it is cancelled and reported to the model as a timeout."
+        }
+    )
+
+    tool_timeouts: Dict[str, float] = field(
+        default_factory=dict,
+        metadata={
+            "description": "Per-tool overrides of tool_timeout, keyed by tool name."
+        }
+    )
+
+    prompt_time_resolution: int = field(
+        default=15,
         metadata={
-            "description": "Object that contains all the services available for booking."
+            "description": "Minutes the current time in the prompt is rounded down to, "
+            "so repeated requests share the same prompt text."
         }
     )
 
     max_attempts: int = field(
-        default=3,
+        default=10,
         metadata={
-            "description": "The maximum number of attempts to make to the LLM."
+            "description": "The maximum number of calls to the LLM for one user message "
+            "before the turn ends with an apology. Retries of a failed call are not counted."
         }
     )
 
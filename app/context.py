@@ -0,0 +1,26 @@
+"""Helpers to keep the conversation sent to the model within a token budget."""
+
+from typing import Sequence
+
+from langchain_core.messages import AnyMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+
+def count_tokens(messages: Sequence[AnyMessage]) -> int:
+    """Approximate the number of prompt tokens used by messages."""
+    return count_tokens_approximately(messages)
+
+
+def find_fold_point(messages: Sequence[AnyMessage], keep_tokens: int) -> int:
+    """
+    Returns how many leading messages should be folded into the summary so the rest fits keep_tokens.
+    The cut always lands on a HumanMessage, so tool calls stay next to their results,
+    and the latest user message is never folded.
+    """
+    human_positions = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    if not human_positions:
+        return 0
+    for position in human_positions:
+        if count_tokens(messages[position:]) <= keep_tokens:
+            return position
+    return human_positions[-1]
@@ -1,15 +1,30 @@
+import asyncio
+import json
+import time
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
-from typing import Dict, List, Literal, cast
+from typing import Dict, List, Literal, Optional, Tuple, cast
 
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph
-from langgraph.prebuilt import ToolNode
+from langgraph.graph.state import CompiledStateGraph
 
+from app.calendar import CalendarError
 from app.configuration import Configuration
+from app.context import count_tokens, find_fold_point
+from app.memo import tool_turn
+from app.router import classify, format_services, format_slots
+from app.resilience import CircuitBreaker, CircuitOpenError, acall_with_retry, ahedged
+from app.prompts import CATALOG_CONTEXT, SUMMARY_CONTEXT, SUMMARY_PROMPT, TIME_CONTEXT
+from app.services import Services
 from app.state import InputState, State
-from app.tools import TOOLS
-from app.utils import load_chat_model
+from app.telemetry import LLM_LATENCY, LLM_TOKENS, MODEL_ROUTES, PROMPT_CACHE_RATIO, span
+from app.tool_runner import ToolRunner
+from app.tools import TOOLS, WRITE_TOOLS, get_available_slots, list_services
+from app.utils import get_message_text, load_bound_chat_model
 
 import logging
 from app.configuration import settings
@@ -18,11 +33,242 @@ logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
+MODEL_UNAVAILABLE_REPLY = "Desculpe, o assistente está temporariamente indisponível. Por favor, tente novamente em alguns minutos."
+
+# Turns seen by the fast-path router and how many it answered
+fast_path_stats = {"turns": 0, "answered": 0}
+
+
+async def fast_path(state: State) -> Dict[str, object]:
+    """
+    Answers clear catalog and availability questions straight from the tools, skipping the LLM.
+    Returns no update when the message is not clearly understood, so the turn continues to the model.
+    """
+    configuration = Configuration.from_context()
+    last_message = state.messages[-1] if state.messages else None
+    # Every user message starts a new turn with a fresh budget of model calls
+    new_turn = {"attempts": 0} if isinstance(last_message, HumanMessage) else {}
+    if not configuration.enable_fast_path or not isinstance(last_message, HumanMessage):
+        return new_turn
+
+    fast_path_stats["turns"] += 1
+    intent = classify(get_message_text(last_message), configuration.services)
+    try:
+        if intent is None:
+            content = None
+        elif intent.name == "list_services":
+            content = format_services(intent, await list_services())
+        else:
+            # The reply goes straight to the user, so it lists every slot of the requested day
+            listing = await get_available_slots(intent.service_name, limit=None, from_day=intent.day, compact=False)
+            content = format_slots(intent, listing["slots"]) if "slots" in listing else None
+    except (CalendarError, CircuitOpenError, asyncio.TimeoutError) as e:
+        # The model can explain the outage better than a canned reply
+        logger.warning(f"Fast path skipped, calendar unavailable: {e!r}")
+        content = None
+
+    if content is not None:
+        fast_path_stats["answered"] += 1
+    logger.info(
+        "Fast path %s (%d/%d turns answered locally, %.0f%%)",
+        f"answered {intent.name}" if content is not None else "skipped",
+        fast_path_stats["answered"], fast_path_stats["turns"],
+        100 * fast_path_stats["answered"] / fast_path_stats["turns"],
+    )
+    if content is None:
+        return new_turn
+    return {
+        **new_turn,
+        "messages": [AIMessage(content=content)],
+        "intent": intent.name,
+        "service_name": intent.service_name,
+        "appointment_day": intent.day,
+    }
+
+
+def route_fast_path(state: State) -> Literal["__end__", "manage_context"]:
+    # The fast path answered when the turn already ends with an AI message
+    return "__end__" if isinstance(state.messages[-1], AIMessage) else "manage_context"
+
+
+async def manage_context(state: State) -> Dict[str, object]:
+    """
+    Folds older turns into state.summary when the unsummarized history exceeds the token budget.
+    Only messages not yet summarized are sent to the summarizer, so the summary grows incrementally.
+    """
+    configuration = Configuration.from_context()
+    pending = state.messages[state.summarized_count:]
+    pending_tokens = count_tokens(pending)
+    if pending_tokens <= configuration.max_context_tokens:
+        return {}
+
+    # Keep half of the budget verbatim so the next turns do not trigger a new summary right away
+    fold = find_fold_point(pending, configuration.max_context_tokens // 2)
+    if fold == 0:
+        return {}
+    logger.info("Summarizing %d messages (%d tokens pending)", fold, pending_tokens)
+    model = load_bound_chat_model(configuration.model, configuration.llm_api_key, ())
+    prompt = [
+        {"role": "system", "content": SUMMARY_PROMPT.format(summary=state.summary or "-")},
+        *pending[:fold],
+        HumanMessage(content="Resuma a conversa acima."),
+    ]
+    try:
+        response = await acall_with_retry(
+            lambda: model.ainvoke(prompt),
+            f"llm:{configuration.model}", _is_retryable_llm_error, settings.LLM_MAX_ATTEMPTS, _llm_breaker(configuration.model),
+        )
+    except Exception as e:
+        # The summary can wait for a later turn; call_model decides what the user is told
+        logger.warning("Summarization skipped this turn: %r", e)
+        return {}
+    return {"summary": response.content, "summarized_count": state.summarized_count + fold}
+
+
+def quantize_time(now: datetime, resolution_minutes: int) -> str:
+    # Rounded down to the resolution, so every step within it sees the same text
+    minute = now.minute - now.minute % max(resolution_minutes, 1)
+    return now.replace(minute=minute, second=0, microsecond=0).isoformat(timespec="minutes")
+
+
+@lru_cache(maxsize=32)
+def _stable_prefix(system_prompt: str, services: Services, system_time: str) -> Tuple[Dict[str, str], ...]:
+    """
+    System prompt and catalog messages, rendered once per prompt and catalog.
+    The default prompt has no system_time, so its rendering is byte-identical across steps and turns.
+    """
+    services_names = ", ".join(service.get_name() for service in services.get_all())
+    return (
+        {"role": "system", "content": system_prompt.format(system_time=system_time, services=services_names)},
+        {"role": "system", "content": CATALOG_CONTEXT.format(services=services_names)},
+    )
+
+
+def assemble_prompt(configuration: Configuration, state: State, now: datetime) -> List[object]:
+    """
+    Orders the prompt for provider-side prompt caching: the stable system prompt and catalog first
+    (tool schemas are bound to the model in a fixed order), then the summary and the conversation,
+    and the quantized current time last.
+    """
+    system_time = quantize_time(now, configuration.prompt_time_resolution)
+    # Custom prompts may still embed the time; only then does it need to be part of the cache key
+    prefix_time = system_time if "{system_time}" in configuration.system_prompt else ""
+    prompt: List[object] = list(_stable_prefix(configuration.system_prompt, configuration.services, prefix_time))
+    if state.summary:
+        prompt.append({"role": "system", "content": SUMMARY_CONTEXT.format(summary=state.summary)})
+    prompt.extend(state.messages[state.summarized_count:])
+    prompt.append({"role": "system", "content": TIME_CONTEXT.format(system_time=system_time)})
+    return prompt
+
+
+def _tool_failed(message: ToolMessage) -> bool:
+    if message.status == "error":
+        return True
+    try:
+        content = json.loads(get_message_text(message))
+    except ValueError:
+        return False
+    return isinstance(content, dict) and content.get("status") in ("error", "timeout")
+
+
+def choose_model(configuration: Configuration, state: State) -> Tuple[str, str]:
+    """
+    Picks the model tier for the next ReAct step and the reason, as ("fast" | "primary", reason).
+    Routine steps go to the fast model: choosing a tool for a short user message and turning
+    successful tool results into a reply. Tool errors, long or ambiguous messages and long histories
+    escalate to the primary model.
+    """
+    if not configuration.fast_model:
+        return "primary", "disabled"
+    pending = state.messages[state.summarized_count:]
+    if count_tokens(pending) > configuration.fast_model_max_context_tokens:
+        return "primary", "long_context"
+
+    last_message = state.messages[-1]
+    if isinstance(last_message, ToolMessage):
+        # All results of the last tool step, which the reply has to account for
+        results = []
+        for message in reversed(state.messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.append(message)
+        if any(_tool_failed(message) for message in results):
+            return "primary", "tool_error"
+        return "fast", "tool_result"
+    if isinstance(last_message, HumanMessage):
+        if len(get_message_text(last_message).split()) > configuration.fast_model_max_words:
+            return "primary", "ambiguous"
+        return "fast", "tool_selection"
+    return "primary", "other"
+
+
+def _unusable(response: AIMessage) -> bool:
+    # No text and nothing valid to run; escalating then re-streams nothing the user has already seen
+    tool_names = tool_runner.tools_by_name
+    return not get_message_text(response).strip() and (
+        not response.tool_calls
+        or bool(response.invalid_tool_calls)
+        or any(call["name"] not in tool_names for call in response.tool_calls)
+    )
+
+
+# One breaker per model, so an outage of the fast model does not block the primary one
+_llm_breakers: Dict[str, CircuitBreaker] = {}
+# Provider errors without a status code that are still worth retrying
+RETRYABLE_LLM_ERRORS = {"APIConnectionError", "APITimeoutError"}
+
+
+def _llm_breaker(model_name: str) -> CircuitBreaker:
+    breaker = _llm_breakers.get(model_name)
+    if breaker is None:
+        breaker = _llm_breakers[model_name] = CircuitBreaker(f"llm:{model_name}", settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+    return breaker
+
+
+def _is_retryable_llm_error(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    if any(cls.__name__ in RETRYABLE_LLM_ERRORS for cls in type(error).__mro__):
+        return True
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError))
+
+
+async def _invoke(configuration: Configuration, model_name: str, route: str, prompt: List[object], attempt: int) -> AIMessage:
+    model = load_bound_chat_model(model_name, configuration.llm_api_key, tuple(TOOLS))
+    with span("call_model", model=model_name, route=route, messages=len(prompt), attempt=attempt) as current:
+        started = time.perf_counter()
+        response = cast(
+            AIMessage,
+            await acall_with_retry(
+                # The hedged copy runs without callbacks so its tokens are not streamed twice
+                lambda: ahedged(lambda: model.ainvoke(prompt), "llm", settings.LLM_HEDGE_DELAY, lambda: model.ainvoke(prompt, config={"callbacks": []})),
+                f"llm:{model_name}", _is_retryable_llm_error, settings.LLM_MAX_ATTEMPTS, _llm_breaker(model_name),
+            ),
+        )
+        LLM_LATENCY.observe(time.perf_counter() - started, model=model_name, route=route)
+        usage = response.usage_metadata or {}
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        current.set_attributes(
+            input_tokens=usage.get("input_tokens"),
+            cached_tokens=cached_tokens,
+            output_tokens=usage.get("output_tokens"),
+            tool_calls=len(response.tool_calls),
+        )
+    LLM_TOKENS.inc(usage.get("input_tokens", 0), model=model_name, kind="input")
+    LLM_TOKENS.inc(cached_tokens, model=model_name, kind="cache_read")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0), model=model_name, kind="output")
+    if usage.get("input_tokens"):
+        PROMPT_CACHE_RATIO.observe(cached_tokens / usage["input_tokens"], model=model_name)
+    logger.info("Model %s responded with message id: %s (%s of %s prompt tokens cached)", model_name, response.id, cached_tokens, usage.get("input_tokens"))
+    return response
+
+
 async def call_model(state: State) -> Dict[str, List[AIMessage]]:
     configuration = Configuration.from_context()
     logger.info("Starting call_model with %d previous messages", len(state.messages))
    
-    attempts = getattr(state, "attempts", 0) + 1
+    attempts = state.attempts + 1
     if attempts > configuration.max_attempts:
         logger.warning("Max attempts reached (%d), aborting conversation", configuration.max_attempts)
         return {
@@ -34,23 +280,37 @@ async def call_model(state: State) -> Dict[str, List[AIMessage]]:
             "is_last_step": True
         }
 
-    services_list = configuration.services.get_all()
-    services_names = ", ".join(service.get_name() for service in services_list)
-    model = load_chat_model(configuration.model, api_key=configuration.llm_api_key).bind_tools(TOOLS)
+    prompt = assemble_prompt(configuration, state, datetime.now(tz=ZoneInfo(settings.TIMEZONE)))
+    logger.debug("System prompt: %s", prompt[0]["content"])
 
-    system_message = configuration.system_prompt.format(
-        system_time=datetime.now(tz=ZoneInfo("America/Sao_Paulo")).isoformat(),
-        services=services_names
-    )
-    logger.debug("System prompt: %s", system_message)
-
-    response = cast(
-        AIMessage,
-        await model.ainvoke(
-            [{"role": "system", "content": system_message}, *state.messages]
-        ),
-    )
-    logger.info("Model responded with message id: %s", response.id)
+    route, reason = choose_model(configuration, state)
+    if route == "fast":
+        try:
+            response = await _invoke(configuration, configuration.fast_model, route, prompt, attempts)
+        except Exception as e:
+            if not (_is_retryable_llm_error(e) or isinstance(e, CircuitOpenError)):
+                raise
+            logger.warning("Fast model %s unavailable (%s), escalating to %s", configuration.fast_model, e, configuration.model)
+            route, reason = "primary", "fast_error"
+        else:
+            if _unusable(response):
+                logger.info("Fast model %s gave no usable answer, escalating to %s", configuration.fast_model, configuration.model)
+                route, reason = "primary", "fast_output"
+    if route == "primary":
+        try:
+            response = await _invoke(configuration, configuration.model, route, prompt, attempts)
+        except Exception as e:
+            if not (_is_retryable_llm_error(e) or isinstance(e, CircuitOpenError)):
+                raise
+            # Retries are exhausted or the circuit is open: end the turn with an explicit apology
+            logger.error("Model %s unavailable: %s", configuration.model, e)
+            MODEL_ROUTES.inc(route=route, reason="unavailable")
+            return {
+                "messages": [AIMessage(content=MODEL_UNAVAILABLE_REPLY)],
+                "attempts": attempts,
+            }
+    MODEL_ROUTES.inc(route=route, reason=reason)
+    logger.debug("Step answered by the %s model (%s)", route, reason)
 
     if state.is_last_step and response.tool_calls:
         logger.info("No valid answer after last step, returning fallback message.")
@@ -66,10 +326,39 @@ async def call_model(state: State) -> Dict[str, List[AIMessage]]:
     return {"messages": [response], "attempts": attempts}
 
 
+tool_runner = ToolRunner(TOOLS)
+
+
+async def call_tools(state: State, config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+    """
+    Runs the tool calls of the last AI message concurrently, each bounded by its configured timeout.
+    The turn-scoped tool cache is bound to the current user message.
+    """
+    configuration = Configuration.from_context()
+    tool_calls = state.messages[-1].tool_calls
+    turn_id = next((message.id for message in reversed(state.messages) if isinstance(message, HumanMessage)), None)
+    # A timed-out booking may still complete in its worker thread, so writes are never cut off
+    timeouts = {**{name: None for name in WRITE_TOOLS}, **configuration.tool_timeouts}
+    with tool_turn(turn_id):
+        messages = await tool_runner.run(tool_calls, config, configuration.tool_timeout, timeouts)
+    return {"messages": messages}
+
+
+def warm_up() -> None:
+    """Build the default bound chat models ahead of the first message."""
+    configuration = Configuration()
+    for model_name in filter(None, (configuration.model, configuration.fast_model)):
+        load_bound_chat_model(model_name, configuration.llm_api_key, tuple(TOOLS))
+
+
 builder = StateGraph(State, input=InputState, config_schema=Configuration)
+builder.add_node(fast_path)
+builder.add_node(manage_context)
 builder.add_node(call_model)
-builder.add_node("tools", ToolNode(TOOLS))
-builder.add_edge("__start__", "call_model")
+builder.add_node("tools", call_tools)
+builder.add_edge("__start__", "fast_path")
+builder.add_conditional_edges("fast_path", route_fast_path)
+builder.add_edge("manage_context", "call_model")
 
 def route_model_output(state: State) -> Literal["__end__", "tools"]:
     last_message = state.messages[-1]
@@ -90,4 +379,10 @@ builder.add_conditional_edges(
 )
 builder.add_edge("tools", "call_model")
 
-graph = builder.compile(name="Nexia")
\ No newline at end of file
+
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None) -> CompiledStateGraph:
+    """Compile the agent, optionally persisting conversation state per thread_id with checkpointer."""
+    return builder.compile(name="Nexia", checkpointer=checkpointer)
+
+
+graph = build_graph()
\ No newline at end of file
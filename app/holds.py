@@ -0,0 +1,115 @@
+"""Short-lived slot holds that keep concurrent bookings from racing for the same slot."""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Set, Tuple
+
+from app.providers import Provider
+from app.settings import settings
+import logging
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+HELD = "held"
+COMMITTED = "committed"
+
+
+def _key(professional: str, start: datetime) -> Tuple[str, int]:
+    # Case-insensitive professional and a timezone-independent start
+    return professional.strip().lower(), int(start.timestamp())
+
+
+class HoldLedger:
+    """
+    SQLite ledger of slot holds keyed by (professional, start).
+    acquire() is an atomic compare-and-set, so one process or many sharing the file agree on who holds a slot.
+    Committed holds outlive the booking by committed_ttl_seconds, covering other processes' calendar caches.
+    """
+    def __init__(self, path: str, ttl_seconds: float, committed_ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.committed_ttl_seconds = committed_ttl_seconds
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS holds ("
+                " professional TEXT NOT NULL, start INTEGER NOT NULL, owner TEXT NOT NULL,"
+                " status TEXT NOT NULL, expires_at REAL NOT NULL, event_id TEXT,"
+                " PRIMARY KEY (professional, start))"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS holds_expires_at ON holds (expires_at)")
+
+    def acquire(self, professional: str, start: datetime, owner: str, ttl_seconds: Optional[float] = None) -> bool:
+        """
+        Hold the slot for owner. Succeeds when the slot is free, its hold expired or owner already holds it
+        (which extends the hold); fails immediately when someone else holds or booked it.
+        """
+        now = time.time()
+        name, start_key = _key(professional, start)
+        with self._lock:
+            self._connection.execute("DELETE FROM holds WHERE expires_at <= ?", (now,))
+            cursor = self._connection.execute(
+                "INSERT INTO holds (professional, start, owner, status, expires_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (professional, start) DO UPDATE SET expires_at = excluded.expires_at"
+                " WHERE holds.status = ? AND holds.owner = excluded.owner",
+                (name, start_key, owner, HELD, now + (ttl_seconds or self.ttl_seconds), HELD),
+            )
+            acquired = cursor.rowcount == 1
+        logger.debug(f"Hold on {professional} at {start} for {owner}: {'acquired' if acquired else 'conflict'}")
+        return acquired
+
+    def commit(self, professional: str, start: datetime, owner: str, event_id: Optional[str]) -> bool:
+        """Mark owner's hold as booked. Returns False when owner no longer held the slot."""
+        name, start_key = _key(professional, start)
+        with self._lock:
+            cursor = self._connection.execute(
+                "UPDATE holds SET status = ?, event_id = ?, expires_at = ?"
+                " WHERE professional = ? AND start = ? AND owner = ? AND status = ?",
+                (COMMITTED, event_id, time.time() + self.committed_ttl_seconds, name, start_key, owner, HELD),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, professional: str, start: datetime, owner: str) -> bool:
+        """Drop owner's hold, e.g. when the slot turned out to be busy or the booking failed."""
+        name, start_key = _key(professional, start)
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM holds WHERE professional = ? AND start = ? AND owner = ? AND status = ?",
+                (name, start_key, owner, HELD),
+            )
+            return cursor.rowcount == 1
+
+    def taken(self, exclude_owner: Optional[str] = None) -> Set[Tuple[str, int]]:
+        """(lower-cased professional, start timestamp) of every live hold or booking not owned by exclude_owner."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT professional, start FROM holds WHERE expires_at > ? AND owner IS NOT ?",
+                (time.time(), exclude_owner),
+            ).fetchall()
+        return {(professional, start) for professional, start in rows}
+
+    def held_by(self, owner: str) -> Set[Tuple[str, int]]:
+        """(lower-cased professional, start timestamp) of owner's live, not yet booked holds."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT professional, start FROM holds WHERE expires_at > ? AND owner = ? AND status = ?",
+                (time.time(), owner, HELD),
+            ).fetchall()
+        return {(professional, start) for professional, start in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+hold_ledger = Provider(
+    "slot hold ledger",
+    lambda: HoldLedger(settings.HOLDS_DB, settings.HOLD_TTL, committed_ttl_seconds=settings.CALENDAR_CACHE_TTL),
+)
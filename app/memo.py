@@ -0,0 +1,132 @@
+"""Memoization of deterministic tool results with per-turn and process-wide lifetimes."""
+
+import copy
+import functools
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterator, Literal, Optional, Tuple
+
+from unidecode import unidecode
+
+import logging
+from app.settings import settings
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+Scope = Literal["turn", "process"]
+
+# Identifier of the conversation turn the running tools belong to
+_current_turn: ContextVar[Optional[str]] = ContextVar("tool_turn", default=None)
+
+
+def normalize_argument(value: Any) -> Any:
+    # "  Fisioterapia " and "fisioterápia" share a cache entry
+    if isinstance(value, str):
+        return " ".join(re.sub(r"\s+", " ", unidecode(value.lower())).split())
+    return value
+
+
+class ToolCache:
+    """
+    Stores tool results keyed by (tool name, normalized arguments).
+    Turn-scoped entries live in a bounded LRU of turns; process-scoped entries live until invalidated.
+    """
+    def __init__(self, max_turns: int = 256) -> None:
+        self.max_turns = max_turns
+        self._process: Dict[Hashable, Any] = {}
+        self._turns: "OrderedDict[str, Dict[Hashable, Any]]" = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def _store(self, scope: Scope, create: bool = False) -> Optional[Dict[Hashable, Any]]:
+        if scope == "process":
+            return self._process
+        turn = _current_turn.get()
+        if turn is None:
+            return None
+        store = self._turns.get(turn)
+        if store is None and create:
+            store = self._turns[turn] = {}
+            while len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+        if store is not None:
+            self._turns.move_to_end(turn)
+        return store
+
+    def record(self, name: str, hit: bool) -> None:
+        counter = self.hits if hit else self.misses
+        counter[name] = counter.get(name, 0) + 1
+
+    def hit_rate(self, name: str) -> float:
+        total = self.hits.get(name, 0) + self.misses.get(name, 0)
+        return self.hits.get(name, 0) / total if total else 0.0
+
+    def invalidate(self, scope: Scope, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop entries of the current turn (or the process) whose key matches predicate."""
+        store = self._store(scope)
+        if not store:
+            return 0
+        stale = [key for key in store if predicate(key)]
+        for key in stale:
+            del store[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._process.clear()
+        self._turns.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        names = set(self.hits) | set(self.misses)
+        return {
+            name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0), "hit_rate": self.hit_rate(name)}
+            for name in sorted(names)
+        }
+
+
+tool_cache = ToolCache()
+
+
+@contextmanager
+def tool_turn(turn_id: Optional[str]) -> Iterator[None]:
+    """Mark the tools run inside the block as belonging to turn_id, enabling the turn-scoped cache."""
+    token = _current_turn.set(turn_id)
+    try:
+        yield
+    finally:
+        _current_turn.reset(token)
+
+
+def memoize(scope: Scope, extra_key: Optional[Callable[[], Hashable]] = None) -> Callable:
+    """
+    Memoize an async tool. Keys are built from the tool name and its normalized arguments,
+    plus extra_key() when given (e.g. the identity of the loaded catalog).
+    Turn-scoped tools are only cached while a turn is active, see tool_turn.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key: Tuple = (
+                name,
+                tuple(normalize_argument(arg) for arg in args),
+                tuple(sorted((k, normalize_argument(v)) for k, v in kwargs.items())),
+                extra_key() if extra_key else None,
+            )
+            store = tool_cache._store(scope, create=True)
+            if store is not None and key in store:
+                tool_cache.record(name, hit=True)
+                logger.info(f"Tool cache hit for {name} ({scope}), hit rate {tool_cache.hit_rate(name):.0%}")
+                return copy.deepcopy(store[key])
+            result = await func(*args, **kwargs)
+            tool_cache.record(name, hit=False)
+            if store is not None:
+                store[key] = result
+            return copy.deepcopy(result)
+
+        return wrapper
+
+    return decorator
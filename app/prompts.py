@@ -1,7 +1,19 @@
 """Default prompts used by the agent."""
 
 SYSTEM_PROMPT = """Você é um assistente especializado em agendar 
-consultas para serviços de bem-estar, como {services}. 
-Sempre seja cordial, objetivo e mantenha um tom amigável.
+consultas para serviços de bem-estar. 
+Sempre seja cordial, objetivo e mantenha um tom amigável."""
 
-System time: {system_time}"""
\ No newline at end of file
+# Rendered once per catalog and sent right after the system prompt, so the prefix stays cacheable
+CATALOG_CONTEXT = """Serviços disponíveis: {services}"""
+
+# Sent after the conversation, since it changes over time
+TIME_CONTEXT = """System time: {system_time}"""
+
+SUMMARY_PROMPT = """Resuma a conversa abaixo entre um usuário e o assistente de agendamentos.
+Mantenha nome do usuário, serviços, profissionais, dias, horários e agendamentos
+confirmados ou pendentes. Seja breve e use o idioma do usuário.
+
+Resumo anterior: {summary}"""
+
+SUMMARY_CONTEXT = """Resumo da conversa até aqui: {summary}"""
@@ -0,0 +1,53 @@
+"""Lazily created process-wide dependencies (API clients, credentials, models)."""
+
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+import logging
+from app.settings import settings
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Provider(Generic[T]):
+    """
+    Creates a dependency with its factory on first use and reuses it afterwards.
+    Heavy imports belong inside the factory so importing the owning module stays cheap.
+    """
+    def __init__(self, name: str, factory: Callable[[], T]) -> None:
+        self.name = name
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def get(self) -> T:
+        if self._initialized:
+            return self._value
+        with self._lock:
+            if not self._initialized:
+                started = time.perf_counter()
+                self._value = self._factory()
+                self._initialized = True
+                logger.info(f"Initialized {self.name} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return self._value
+
+    def override(self, value: T) -> None:
+        """Use a ready-made value instead of calling the factory, e.g. a fake in tests."""
+        with self._lock:
+            self._value = value
+            self._initialized = True
+
+    def reset(self) -> None:
+        """Forget the current value so the next get() calls the factory again."""
+        with self._lock:
+            self._value = None
+            self._initialized = False
@@ -0,0 +1,219 @@
+"""Retries with jittered backoff, circuit breakers and hedged requests for Calendar and LLM calls."""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.settings import settings
+from app.telemetry import CIRCUIT_TRANSITIONS, HEDGED_REQUESTS, RETRIES
+import logging
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+    def __init__(self, name: str, retry_in: float) -> None:
+        super().__init__(f"{name} is unavailable, not retrying for {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: a random delay up to base * 2**attempt, capped."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _backoff(attempt: int, base_delay: Optional[float], max_delay: Optional[float]) -> float:
+    # Settings are read per call, so they can be changed (or patched) after import
+    return backoff_delay(
+        attempt,
+        settings.RETRY_BASE_DELAY if base_delay is None else base_delay,
+        settings.RETRY_MAX_DELAY if max_delay is None else max_delay,
+    )
+
+
+class CircuitBreaker:
+    """
+    Fails fast once a dependency keeps failing.
+    After failure_threshold consecutive failures the circuit opens and calls raise CircuitOpenError;
+    after reset_timeout one trial call is let through, and its outcome closes or reopens the circuit.
+    """
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"Circuit {self.name} {self.state} -> {state}")
+            CIRCUIT_TRANSITIONS.inc(circuit=self.name, state=state)
+            self.state = state
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError while the circuit is open; admit a single trial call once it may have recovered."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self._transition(HALF_OPEN)
+                return
+            raise CircuitOpenError(self.name, max(retry_in, 0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._transition(CLOSED)
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    operation: str,
+    is_retryable: Callable[[BaseException], bool],
+    attempts: int,
+    breaker: Optional[CircuitBreaker] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> T:
+    """
+    Call func, retrying retryable errors with jittered exponential backoff, up to attempts calls in total.
+    Only retryable errors count against the breaker; others are the caller's problem and raise at once.
+    Backoff delays default to RETRY_BASE_DELAY and RETRY_MAX_DELAY, read at call time.
+    """
+    for attempt in range(max(attempts, 1)):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_retryable(e):
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            # No point waiting for a retry the open circuit would refuse
+            if attempt + 1 >= attempts or (breaker is not None and breaker.state == OPEN):
+                raise
+            delay = _backoff(attempt, base_delay, max_delay)
+            logger.warning(f"{operation} failed ({e}), retry {attempt + 1}/{attempts - 1} in {delay:.2f}s")
+            RETRIES.inc(operation=operation)
+            time.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+async def acall_with_retry(
+    func: Callable[[], Awaitable[T]],
+    operation: str,
+    is_retryable: Callable[[BaseException], bool],
+    attempts: int,
+    breaker: Optional[CircuitBreaker] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+) -> T:
+    """Async counterpart of call_with_retry; backoff sleeps do not block the event loop."""
+    for attempt in range(max(attempts, 1)):
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = await func()
+        except Exception as e:
+            if not is_retryable(e):
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            # No point waiting for a retry the open circuit would refuse
+            if attempt + 1 >= attempts or (breaker is not None and breaker.state == OPEN):
+                raise
+            delay = _backoff(attempt, base_delay, max_delay)
+            logger.warning(f"{operation} failed ({e}), retry {attempt + 1}/{attempts - 1} in {delay:.2f}s")
+            RETRIES.inc(operation=operation)
+            await asyncio.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+def call_hedged(func: Callable[[], T], operation: str, delay: float, executor: Executor) -> T:
+    """
+    Call func and, if it has not returned after delay seconds, start a second identical call on executor.
+    The first result wins; the slower call is left to finish in the background. Only for idempotent reads.
+    """
+    if delay <= 0:
+        return func()
+    first = executor.submit(func)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+    second = executor.submit(func)
+    pending = {first, second}
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        # Both calls may finish together; prefer a success over the other call's error
+        winner = next((future for future in done if future.exception() is None), None)
+        if winner is None and pending:
+            continue
+        winner = winner or (second if second in done else first)
+        HEDGED_REQUESTS.inc(operation=operation, winner="hedge" if winner is second else "original")
+        return winner.result()
+
+
+async def ahedged(func: Callable[[], Awaitable[T]], operation: str, delay: float, hedge: Optional[Callable[[], Awaitable[T]]] = None) -> T:
+    """
+    Await func() and, if it is still running after delay seconds, race it against hedge() (func() by default).
+    The first successful result wins and the other call is cancelled.
+    """
+    if delay <= 0:
+        return await func()
+    first = asyncio.ensure_future(func())
+    done, _ = await asyncio.wait([first], timeout=delay)
+    if done:
+        return first.result()
+    second = asyncio.ensure_future((hedge or func)())
+    pending = {first, second}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Both calls may finish together; prefer a success over the other call's error
+            winner = next((task for task in done if task.exception() is None), None)
+            if winner is None and pending:
+                continue
+            winner = winner or (second if second in done else first)
+            HEDGED_REQUESTS.inc(operation=operation, winner="hedge" if winner is second else "original")
+            return winner.result()
+    finally:
+        for task in pending:
+            task.cancel()
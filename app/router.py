@@ -0,0 +1,129 @@
+"""Local intent classification for messages that can be answered without the LLM."""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from unidecode import unidecode
+
+from app.services import Services
+from app.utils import DAY_MAP
+
+# Phrases are matched on lower-cased, accent-free text
+LIST_SERVICES_PATTERNS = {
+    "pt": [r"\b(quais|que) (sao os )?servicos\b", r"\bservicos (disponiveis|oferecidos)\b", r"\blista de servicos\b"],
+    "es": [r"\b(que|cuales) (son los )?servicios\b", r"\bservicios (disponibles|ofrecen)\b", r"\blista de servicios\b"],
+    "en": [r"\b(what|which) services\b", r"\blist (of )?(the )?services\b", r"\bservices (do you|are available)\b"],
+}
+SLOT_PATTERNS = {
+    "pt": [r"\bhorarios?\b", r"\bdisponibilidade\b", r"\bvagas?\b"],
+    "es": [r"\bhorarios?\b", r"\bdisponibilidad\b", r"\bturnos?\b"],
+    "en": [r"\bavailab(le|ility)\b", r"\bslots?\b", r"\bopenings?\b"],
+}
+# Messages that ask to act, not just to look, always go to the LLM
+ACTION_PATTERN = re.compile(
+    r"\b(agend|marc|reserv|cancel|remarc|mud|alter|book|schedul|resched|change|modific)\w*"
+)
+
+REPLIES = {
+    "pt": {
+        "services": "Estes são os serviços disponíveis: {services}.",
+        "slots": "Horários disponíveis para {service}{day}:\n{slots}",
+        "no_slots": "No momento não há horários disponíveis para {service}{day}.",
+        "day": " na {day}",
+    },
+    "es": {
+        "services": "Estos son los servicios disponibles: {services}.",
+        "slots": "Horarios disponibles para {service}{day}:\n{slots}",
+        "no_slots": "Por ahora no hay horarios disponibles para {service}{day}.",
+        "day": " el {day}",
+    },
+    "en": {
+        "services": "These are the available services: {services}.",
+        "slots": "Available times for {service}{day}:\n{slots}",
+        "no_slots": "There are no available times for {service}{day} right now.",
+        "day": " on {day}",
+    },
+}
+
+
+def _normalize(text: str) -> str:
+    return unidecode(text.lower())
+
+
+def _build_day_aliases() -> Dict[str, str]:
+    # "quarta-feira", "quarta" and "miercoles" all map to their DAY_MAP key
+    aliases = {}
+    for day in DAY_MAP:
+        aliases.setdefault(_normalize(day), day)
+        aliases.setdefault(_normalize(day).split("-")[0], day)
+    return aliases
+
+
+DAY_ALIASES = _build_day_aliases()
+DAY_PATTERN = re.compile(r"\b(" + "|".join(sorted(map(re.escape, DAY_ALIASES), key=len, reverse=True)) + r")\b")
+
+
+@dataclass
+class Intent:
+    """A message intent the fast path can answer, with the entities found in it."""
+    name: str
+    language: str
+    service_name: Optional[str] = None
+    day: Optional[str] = None
+
+
+def _match_language(patterns: Dict[str, List[str]], text: str) -> Optional[str]:
+    for language, language_patterns in patterns.items():
+        if any(re.search(pattern, text) for pattern in language_patterns):
+            return language
+    return None
+
+
+def classify(text: str, services: Services) -> Optional[Intent]:
+    """
+    Returns the intent of a message when it is clearly a catalog or availability question, else None.
+    A service is only recognized when its name or alias appears in the message unambiguously.
+    """
+    normalized = _normalize(text)
+    if ACTION_PATTERN.search(normalized):
+        return None
+
+    language = _match_language(LIST_SERVICES_PATTERNS, normalized)
+    if language:
+        return Intent("list_services", language)
+
+    language = _match_language(SLOT_PATTERNS, normalized)
+    if not language:
+        return None
+    candidates = services.search(text, limit=2)
+    if not candidates or candidates[0][1] < 0.9 or (len(candidates) > 1 and candidates[1][1] >= candidates[0][1]):
+        return None
+    day_match = DAY_PATTERN.search(normalized)
+    return Intent(
+        "get_available_slots",
+        language,
+        service_name=candidates[0][0].get_name(),
+        day=DAY_ALIASES[day_match.group(1)] if day_match else None,
+    )
+
+
+def format_services(intent: Intent, names: List[str]) -> str:
+    return REPLIES[intent.language]["services"].format(services=", ".join(names))
+
+
+def format_slots(intent: Intent, slots: List[dict]) -> str:
+    """Group slots by professional, keeping only the requested weekday when one was given."""
+    replies = REPLIES[intent.language]
+    if intent.day:
+        weekday = DAY_MAP[intent.day]
+        slots = [slot for slot in slots if DAY_MAP.get(slot["day"].strip().lower()) == weekday]
+    day = replies["day"].format(day=intent.day) if intent.day else ""
+    if not slots:
+        return replies["no_slots"].format(service=intent.service_name, day=day)
+    grouped: Dict[str, List[str]] = {}
+    for slot in slots:
+        label = slot["slot"] if intent.day else f"{slot['day']} {slot['slot']}"
+        grouped.setdefault(slot["professional"], []).append(label)
+    lines = "\n".join(f"- {professional}: {', '.join(times)}" for professional, times in grouped.items())
+    return replies["slots"].format(service=intent.service_name, day=day, slots=lines)
@@ -1,18 +1,113 @@
+from __future__ import annotations
+
+import itertools
+import os
+import re
+import threading
+import time
 import yaml
-from datetime import datetime
 import pendulum
 from unidecode import unidecode
 from app.utils import DAY_MAP
-from app.calendar import is_slot_available, create_event
+from app.availability import AvailabilityIndex
+from app.calendar import CalendarError, create_event, create_events
+from app.holds import hold_ledger
 from app.settings import settings
 import logging
-from app.configuration import settings
-from typing import List, Dict, Optional
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    # numpy is only imported by the earliest-slot search, to keep it off the startup path
+    import numpy as np
 
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
+def _parse_minutes(value: str) -> Optional[int]:
+    # "09:30" -> 570, None when the string is not a valid HH:MM time
+    try:
+        hour, minute = map(int, value.strip().split(":"))
+    except ValueError:
+        return None
+    if not (0 <= hour <= 24 and 0 <= minute < 60):
+        return None
+    return hour * 60 + minute
+
+
+def _format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _horizon_days(now: pendulum.DateTime, days: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Local midnight (epoch seconds) and weekday of every day of the horizon, starting today
+    import numpy as np
+    midnights = [now.start_of("day").add(days=offset) for offset in range(days)]
+    return (
+        np.array([day.timestamp() for day in midnights], dtype=np.float64),
+        np.array([int(day.day_of_week) for day in midnights], dtype=np.int64),
+    )
+
+
+def _expand_weekly(weekdays: np.ndarray, minutes: np.ndarray, day_midnights: np.ndarray, day_weekdays: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expands recurring (weekday, start minute) slots into every occurrence within the horizon.
+    Returns the slot index and the start (epoch seconds) of each occurrence.
+    """
+    import numpy as np
+    slot_parts, start_parts = [], []
+    for weekday in np.unique(weekdays):
+        slots = np.nonzero(weekdays == weekday)[0]
+        days = day_midnights[day_weekdays == weekday]
+        if len(days) == 0:
+            continue
+        # Row-major (slot, day) grid, so repeat each slot index once per day
+        slot_parts.append(np.repeat(slots, len(days)))
+        start_parts.append((days[None, :] + minutes[slots, None] * 60).ravel())
+    if not slot_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return np.concatenate(slot_parts), np.concatenate(start_parts)
+
+
+def _slot_arrays(keys: List[Tuple[int, int]], durations: List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Weekday, start minute and duration of each recurring slot as arrays for the vectorized search
+    import numpy as np
+    return (
+        np.array([weekday for weekday, _ in keys], dtype=np.int64),
+        np.array([start for _, start in keys], dtype=np.int64),
+        np.array(durations, dtype=np.int64),
+    )
+
+
+def _earliest_free(weekdays: np.ndarray, minutes: np.ndarray, durations: np.ndarray, offset: int, limit: int,
+                   horizon_weeks: Optional[int], availability: Optional[AvailabilityIndex],
+                   skip: Optional[Callable[[int, int], bool]] = None) -> List[Tuple[int, pendulum.DateTime]]:
+    """
+    Finds the earliest free occurrences of recurring slots between now and the horizon.
+    Returns (slot index, start) pairs sorted by start and then slot index, paginated by offset/limit.
+    skip(slot index, start timestamp) drops further occurrences, e.g. ones held by other conversations.
+    """
+    import numpy as np
+    now = pendulum.now(settings.TIMEZONE)
+    weeks = horizon_weeks or settings.SLOT_SEARCH_HORIZON_WEEKS
+    horizon_end = now.start_of("day").add(weeks=weeks)
+    if availability is None or not availability.covers(now, horizon_end):
+        availability = AvailabilityIndex.fetch(now, horizon_end)
+
+    slots, starts = _expand_weekly(weekdays, minutes, *_horizon_days(now, weeks * 7))
+    ends = starts + durations[slots] * 60
+    free = (starts > now.timestamp()) & availability.free_mask(starts, ends)
+    slots, starts = slots[free], starts[free]
+    order = np.lexsort((slots, starts))
+    if skip is None:
+        order = order[offset:offset + limit]
+    else:
+        # Filtered before paginating, so pages stay full; only the first offset + limit are ever checked
+        order = list(itertools.islice((i for i in order if not skip(int(slots[i]), int(starts[i]))), offset, offset + limit))
+    return [(int(slots[i]), pendulum.from_timestamp(float(starts[i]), tz=settings.TIMEZONE)) for i in order]
+
+
 class Service:
     """
     Represents a service that can be scheduled with professionals.
@@ -25,6 +120,46 @@ class Service:
         self.duration = data.get("duration")
         self.description = data.get("description")
         self.professionals = data.get("professionals", [])
+        self.aliases = data.get("aliases", [])
+        self._compile_schedule()
+
+    def _compile_schedule(self) -> None:
+        """
+        Expands the professionals' availability into bookable slots once, as integer minute offsets.
+        Builds (weekday, start) -> professionals and professional -> slots lookups.
+        """
+        # Lower-cased professional name -> list of (weekday, start minute, day label)
+        self._slots_by_professional: Dict[str, List[Tuple[int, int, str]]] = {}
+        # (weekday, start minute) -> professional names, in catalog order
+        self._professionals_by_start: Dict[Tuple[int, int], List[str]] = {}
+        self._professional_names: Dict[str, str] = {}
+        self._day_labels: Dict[int, str] = {}
+        duration = self.get_duration()
+        for prof in self.professionals:
+            self._professional_names[prof["name"].lower()] = prof["name"]
+            prof_slots = self._slots_by_professional.setdefault(prof["name"].lower(), [])
+            for availability_entry in prof.get("availability", []):
+                weekday = DAY_MAP.get(availability_entry["day"].strip().lower())
+                if weekday is None:
+                    logger.warning(f"Unknown day '{availability_entry['day']}' for {prof['name']} in {self.name}")
+                    continue
+                self._day_labels.setdefault(int(weekday), availability_entry["day"])
+                for slot in availability_entry.get("slots", []):
+                    start_str, end_str = slot.split("-")
+                    start, end = _parse_minutes(start_str), _parse_minutes(end_str)
+                    if start is None or end is None or not duration:
+                        logger.warning(f"Invalid slot '{slot}' for {prof['name']} in {self.name}")
+                        continue
+                    while start + duration <= end:
+                        prof_slots.append((int(weekday), start, availability_entry["day"]))
+                        names = self._professionals_by_start.setdefault((int(weekday), start), [])
+                        if prof["name"] not in names:
+                            names.append(prof["name"])
+                        start += duration
+
+        # Distinct recurring slots; their arrays are built on the first earliest-slot search
+        self._slot_keys: List[Tuple[int, int]] = list(self._professionals_by_start)
+        self._slot_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
 
     def get_name(self) -> str:
         # Return the name of the service
@@ -46,135 +181,194 @@ class Service:
         # Return the list of professionals associated with the service
         return self.professionals
 
-    def get_available_professionals(self, target_day: str, target_time: str) -> List[str]:
+    def get_aliases(self) -> List[str]:
+        # Return alternative names (e.g. translations) of the service
+        return self.aliases
+
+    def get_available_professionals(self, target_day: str, target_time: str, availability: Optional[AvailabilityIndex] = None) -> List[str]:
         """
         Returns a list of professional names available at the given day and time.
-        Uses _validate_slot to ensure the slot is actually available.
+        Uses the calendar availability to ensure the slot is actually free.
         Accepts target_day as a date string (YYYY-MM-DD) or day name in Portuguese.
         """
         logger.debug(f"Checking available professionals for {target_day} at {target_time}")
-        try:
-            normalized_time = datetime.strptime(target_time.strip(), "%H:%M").strftime("%H:%M")
-        except ValueError:
+        appointment_dt = self._resolve_start(target_day, target_time)
+        if appointment_dt is None:
             return []
 
-        # Detect if target_day is a date (e.g., 2025-07-17)
-        try:
-            date_obj = pendulum.parse(target_day.strip())
-            day_key = date_obj.format("dddd", locale="pt").lower()
-        except Exception:
-            day_key = target_day.strip().lower()
-
-        available = []
-
-        for prof in self.professionals:
-            for availability in prof.get("availability", []):
-                if availability["day"].lower() == day_key:
-                    for slot in availability.get("slots", []):
-                        start_str, _ = slot.split("-")
-                        try:
-                            normalized_start = datetime.strptime(start_str.strip(), "%H:%M").strftime("%H:%M")
-                        except ValueError:
-                            continue
-                        if normalized_start == normalized_time and self._validate_slot(day_key, normalized_time):
-                            available.append(prof["name"])
-                            break
+        candidates = self._professionals_by_start.get((int(appointment_dt.day_of_week), _parse_minutes(target_time)), [])
+        # Fetch busy blocks only once a candidate slot exists
+        if not candidates:
+            available = []
+        else:
+            if availability is None:
+                availability = self._load_availability()
+            available = list(candidates) if self._is_free_at(appointment_dt, availability) else []
         logger.debug(f"Available professionals at {target_day} {target_time}: {available}")
         return available
 
-    def find_professionals_for_slot(self, day: str, time: str) -> List[str]:
-        # Wrapper method to find professionals available for a specific day and time slot
-        return self.get_available_professionals(day, time)
-
-    def get_available_slots(self) -> List[Dict[str, str]]:
+    def get_available_slots(self, owner: Optional[str] = None) -> List[Dict[str, str]]:
         """
         Aggregates and returns all available slots for all professionals of the service.
         Each slot includes professional name, day, and time slot string.
+        Slots held by someone other than owner are left out.
         """
         logger.debug(f"Getting available slots for service {self.name}")
         slots = []
-        duration = self.get_duration()
+        # One calendar fetch and one hold lookup shared by every professional of the service
+        availability = self._load_availability()
+        held = hold_ledger.get().taken(exclude_owner=owner)
         for prof in self.professionals:
-            slots.extend(self.get_slots_for_professional(prof["name"]))
+            slots.extend(self.get_slots_for_professional(prof["name"], availability, owner=owner, held=held))
         return slots
 
-    def get_slots_for_professional(self, professional_name: str) -> List[Dict[str, str]]:
+    def get_slots_for_professional(self, professional_name: str, availability: Optional[AvailabilityIndex] = None, owner: Optional[str] = None, held: Optional[Set[Tuple[str, int]]] = None) -> List[Dict[str, str]]:
         """
         Returns all available time slots for a given professional.
-        Slots are generated based on professional's availability and service duration.
+        Slots come from the schedule compiled at load time; slots held by someone other than owner are left out.
         """
+        key = professional_name.strip().lower()
+        prof_slots = self._slots_by_professional.get(key)
+        if not prof_slots:
+            return []
+        if availability is None:
+            availability = self._load_availability()
+        if held is None:
+            held = hold_ledger.get().taken(exclude_owner=owner)
+        name = self._professional_names[key]
+        duration = self.get_duration()
+        day_starts = self._next_day_starts()
         slots = []
-        for prof in self.professionals:
-            if prof["name"].lower() == professional_name.lower():
-                for availability in prof.get("availability", []):
-                    for slot in availability.get("slots", []):
-                        start_str, end_str = slot.split("-")
-                        start_time = pendulum.parse(start_str, strict=False)
-                        end_time = pendulum.parse(end_str, strict=False)
-
-                        current_time = start_time
-                        while current_time.add(minutes=self.get_duration()) <= end_time:
-                            current_time_str = current_time.format("HH:mm")
-                            if self._validate_slot(availability["day"], current_time_str):
-                                slots.append({
-                                    "professional": prof["name"],
-                                    "day": availability["day"],
-                                    "slot": f"{current_time_str}-{(current_time.add(minutes=self.get_duration())).format('HH:mm')}"
-                                })
-                            current_time = current_time.add(minutes=self.get_duration())
+        for weekday, start, day_label in prof_slots:
+            start_dt = self._slot_start(weekday, start, day_starts)
+            if (key, int(start_dt.timestamp())) in held:
+                continue
+            if self._is_free_at(start_dt, availability):
+                slots.append({
+                    "professional": name,
+                    "day": day_label,
+                    "date": start_dt.to_date_string(),
+                    "slot": f"{_format_minutes(start)}-{_format_minutes(start + duration)}"
+                })
         return slots
 
-    def _validate_slot(self, requested_day: str, requested_time: str) -> bool:
-        day_key = requested_day.strip().lower()
-        english_day = DAY_MAP.get(day_key)
-        if not english_day:
-            return False
+    def _load_availability(self) -> AvailabilityIndex:
+        # Slots are always booked on the next occurrence of a weekday, i.e. within the coming 7 days
+        window_start = pendulum.now(settings.TIMEZONE).add(days=1).start_of("day")
+        return AvailabilityIndex.fetch(window_start, window_start.add(days=7))
+
+    def _next_day_starts(self) -> Dict[int, pendulum.DateTime]:
+        # Midnight of the next occurrence of every weekday
+        today = pendulum.now(settings.TIMEZONE)
+        return {int(weekday): today.next(weekday) for weekday in set(DAY_MAP.values())}
+
+    def _slot_start(self, weekday: int, start: int, day_starts: Optional[Dict[int, pendulum.DateTime]] = None) -> pendulum.DateTime:
+        day_start = (day_starts or self._next_day_starts())[weekday]
+        return day_start.replace(hour=start // 60, minute=start % 60, second=0, microsecond=0)
 
+    def _is_free_at(self, appointment_dt: pendulum.DateTime, availability: Optional[AvailabilityIndex] = None) -> bool:
+        end_dt = appointment_dt.add(minutes=self.get_duration())
+        if availability is None or not availability.covers(appointment_dt, end_dt):
+            availability = AvailabilityIndex.fetch(appointment_dt, end_dt)
+        return availability.is_free(appointment_dt, end_dt)
+
+    def _candidates_at(self, start_dt: pendulum.DateTime, professional_name: Optional[str] = None) -> List[str]:
+        # Professionals whose compiled schedule has a slot starting at start_dt, optionally only the named one
+        candidates = self._professionals_by_start.get((int(start_dt.day_of_week), start_dt.hour * 60 + start_dt.minute), [])
+        if professional_name:
+            return [name for name in candidates if name.lower() == professional_name.strip().lower()]
+        return list(candidates)
+
+    def _resolve_start(self, requested_day: str, requested_time: str, day_starts: Optional[Dict[int, pendulum.DateTime]] = None) -> Optional[pendulum.DateTime]:
+        # A weekday name means its next occurrence, a date (e.g., 2025-07-17) means that exact day
+        start = _parse_minutes(requested_time)
+        # "24:00" is a valid slot end but not a start time
+        if start is None or start >= 24 * 60:
+            return None
+        weekday = DAY_MAP.get(requested_day.strip().lower())
+        if weekday is not None:
+            return self._slot_start(int(weekday), start, day_starts)
         try:
-            hour, minute = map(int, requested_time.strip().split(":"))
-        except ValueError:
-            return False
+            day = pendulum.parse(requested_day.strip(), tz=settings.TIMEZONE)
+        except Exception:
+            return None
+        return day.start_of("day").add(minutes=start)
 
-        today = pendulum.now(settings.TIMEZONE)
-        appointment_dt = today.next(english_day).replace(hour=hour, minute=minute, second=0, microsecond=0)
-        duration = self.get_duration()
+    def find_earliest_slots(self, limit: int = 10, offset: int = 0, horizon_weeks: Optional[int] = None, availability: Optional[AvailabilityIndex] = None, owner: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Returns the earliest free slots of the service over the coming weeks, across all professionals.
+        Results are sorted by start time; offset and limit select the page. Slots held by others are left out.
+        """
+        if self._slot_arrays is None:
+            self._slot_arrays = _slot_arrays(self._slot_keys, [self.get_duration() or 0] * len(self._slot_keys))
+        held = hold_ledger.get().taken(exclude_owner=owner)
+        skip = (lambda slot, start: not self._unheld_professionals(self._slot_keys[slot], start, held)) if held else None
+        found = _earliest_free(*self._slot_arrays, offset, limit, horizon_weeks, availability, skip)
+        return [self._format_occurrence(self._slot_keys[slot], start, held) for slot, start in found]
 
-        return is_slot_available(appointment_dt, appointment_dt.add(minutes=duration))
+    def _unheld_professionals(self, key: Tuple[int, int], start: int, held: Set[Tuple[str, int]]) -> List[str]:
+        # Professionals working the recurring slot whose occurrence at start (epoch seconds) nobody else holds
+        return [name for name in self._professionals_by_start[key] if (name.lower(), start) not in held]
 
-    def schedule(self, user_name: str, requested_day: str, requested_time: str, professional_name: Optional[str] = None) -> Dict[str, str]:
+    def _format_occurrence(self, key: Tuple[int, int], start_dt: pendulum.DateTime, held: Set[Tuple[str, int]] = frozenset()) -> Dict[str, object]:
+        return {
+            "service": self.name,
+            "professionals": self._unheld_professionals(key, int(start_dt.timestamp()), held),
+            "date": start_dt.to_date_string(),
+            "day": self._day_labels[key[0]],
+            "slot": f"{_format_minutes(key[1])}-{_format_minutes(key[1] + self.get_duration())}",
+        }
+
+    def schedule(self, user_name: str, requested_day: str, requested_time: str, professional_name: Optional[str] = None, owner: Optional[str] = None) -> Dict[str, str]:
         """
         Attempts to schedule an appointment for the user with a professional.
         If no professional specified, tries all available professionals for that slot.
+        Each professional's slot is held for owner (the conversation, by default the user) before the calendar
+        is checked, so concurrent requests for the same slot cannot both book it.
         Returns a status dict indicating success, error, or no availability.
         """
         logger.info(f"Attempting to schedule {self.name} for {user_name} on {requested_day} at {requested_time} with {professional_name if professional_name else 'any available professional'}")
-        appointment_dt = None
+        owner = owner or user_name
         duration = self.get_duration()
-        if not professional_name:
-            professionals = self.find_professionals_for_slot(requested_day, requested_time)
-        else:
-            professionals = [professional_name]
-
-        for professional in professionals:
-            if self._validate_slot(requested_day, requested_time):
-                now = pendulum.now(settings.TIMEZONE)
-                day_key = requested_day.strip().lower()
-                english_day = DAY_MAP.get(day_key)
-                if not english_day:
+        appointment_dt = self._resolve_start(requested_day, requested_time)
+        if appointment_dt is not None and appointment_dt <= pendulum.now(settings.TIMEZONE):
+            return {"status": "error", "message": f"O horário {appointment_dt.to_datetime_string()} já passou."}
+        professionals = self._candidates_at(appointment_dt, professional_name) if appointment_dt is not None else []
+        ledger = hold_ledger.get()
+        if len(professionals) > 1:
+            # A professional this conversation already holds (see hold) is booked first
+            mine = ledger.held_by(owner)
+            professionals.sort(key=lambda name: (name.lower(), int(appointment_dt.timestamp())) not in mine)
+        held = None
+        availability = None
+        try:
+            for professional in professionals:
+                # Someone else is booking this slot right now, no need to ask the calendar
+                if not ledger.acquire(professional, appointment_dt, owner):
                     continue
-                try:
-                    hour, minute = map(int, requested_time.strip().split(":"))
-                except ValueError:
+                held = professional
+                # The calendar is read only once a hold was won
+                if availability is None:
+                    availability = self._load_availability()
+                if not self._is_free_at(appointment_dt, availability):
+                    ledger.release(professional, appointment_dt, owner)
+                    held = None
                     continue
-                appointment_dt = now.next(english_day).replace(hour=hour, minute=minute, second=0, microsecond=0)
                 # If slot is free, create event and return success
                 event_id = create_event(user_name, self.name, professional, appointment_dt, duration)
+                ledger.commit(professional, appointment_dt, owner, event_id)
                 logger.info(f"Appointment scheduled: {event_id}")
                 return {
                     "status": "success",
                     "message": f"Cita agendada com {professional} em {appointment_dt.to_datetime_string()}",
                     "event_id": event_id,
                 }
+        except CalendarError as e:
+            # Nothing was booked, so the slot goes back to everyone
+            if held is not None:
+                ledger.release(held, appointment_dt, owner)
+            logger.error(f"Scheduling {self.name} for {user_name} failed: {e}")
+            return {"status": "error", "message": f"{e}. Nenhum agendamento foi feito; tente novamente em instantes."}
 
         # If no professionals available at the requested time, return no availability
         logger.warning(f"No availability for {self.name} on {requested_day} at {requested_time}")
@@ -183,33 +377,319 @@ class Service:
             "message": f"Todos os profissionais estão ocupados nesse horário para {self.name} na {requested_day} às {requested_time}.",
         }
 
+    def hold(self, requested_day: str, requested_time: str, owner: str, professional_name: Optional[str] = None) -> Optional[str]:
+        """
+        Reserves a slot for owner while the user confirms, without booking it.
+        Only professionals scheduled at that time are held, and only while the calendar shows the slot free.
+        Returns the professional holding the slot, or None when the slot is busy or every candidate is taken.
+        """
+        appointment_dt = self._resolve_start(requested_day, requested_time)
+        if appointment_dt is None or appointment_dt <= pendulum.now(settings.TIMEZONE):
+            return None
+        ledger = hold_ledger.get()
+        for professional in self._candidates_at(appointment_dt, professional_name):
+            if not ledger.acquire(professional, appointment_dt, owner):
+                continue
+            try:
+                free = self._is_free_at(appointment_dt, self._load_availability())
+            except CalendarError:
+                ledger.release(professional, appointment_dt, owner)
+                raise
+            if not free:
+                # Calendar events block the slot for every professional
+                ledger.release(professional, appointment_dt, owner)
+                return None
+            logger.info(f"Held {self.name} with {professional} at {appointment_dt.to_datetime_string()} for {owner}")
+            return professional
+        return None
+
+    def schedule_many(self, appointments: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Books several appointments at once, e.g. a clinic's imported agenda or a series of sessions.
+        Each appointment has user_name, day (weekday name or YYYY-MM-DD), time and optionally professional_name.
+        All of them are validated against one availability snapshot and inserted with Calendar batch requests.
+        Returns one status dict per appointment, in input order.
+        """
+        logger.info(f"Attempting to schedule {len(appointments)} appointments of {self.name} in bulk")
+        duration = self.get_duration()
+        day_starts = self._next_day_starts()
+        now = pendulum.now(settings.TIMEZONE)
+        results: List[Optional[Dict[str, str]]] = [None] * len(appointments)
+
+        # Parse every request first so a single calendar fetch can cover all of them
+        requested = []
+        for index, appointment in enumerate(appointments):
+            day, time_str = appointment.get("day", ""), appointment.get("time", "")
+            appointment_dt = self._resolve_start(day, time_str, day_starts) if appointment.get("user_name") else None
+            if appointment_dt is None:
+                results[index] = {"status": "error", "message": f"Pedido inválido para {self.name}: {day} {time_str}."}
+            elif appointment_dt <= now:
+                results[index] = {"status": "error", "message": f"O horário {appointment_dt.to_datetime_string()} já passou."}
+            else:
+                requested.append((index, appointment_dt))
+
+        accepted = []
+        ledger = hold_ledger.get()
+        if requested:
+            availability = AvailabilityIndex.fetch(
+                min(start for _, start in requested),
+                max(start for _, start in requested).add(minutes=duration),
+            )
+            for index, appointment_dt in requested:
+                appointment = appointments[index]
+                end_dt = appointment_dt.add(minutes=duration)
+                # A named professional must work that slot too
+                candidates = self._candidates_at(appointment_dt, appointment.get("professional_name"))
+                # First candidate nobody else is holding
+                professional = None
+                if availability.is_free(appointment_dt, end_dt):
+                    professional = next((p for p in candidates if ledger.acquire(p, appointment_dt, appointment["user_name"])), None)
+                if professional is None:
+                    results[index] = {
+                        "status": "no_availability",
+                        "message": f"Todos os profissionais estão ocupados nesse horário para {self.name} em {appointment_dt.to_datetime_string()}.",
+                    }
+                    continue
+                # Later requests of the same batch must not get the slot just taken
+                availability.add_busy(appointment_dt, end_dt)
+                accepted.append((index, professional, appointment_dt))
+
+        created = create_events([
+            {"user_name": appointments[index]["user_name"], "service_name": self.name, "professional_name": professional, "start_time": appointment_dt, "duration_minutes": duration}
+            for index, professional, appointment_dt in accepted
+        ])
+        for (index, professional, appointment_dt), (event_id, error) in zip(accepted, created):
+            owner = appointments[index]["user_name"]
+            if error is None:
+                ledger.commit(professional, appointment_dt, owner, event_id)
+                results[index] = {
+                    "status": "success",
+                    "message": f"Cita agendada com {professional} em {appointment_dt.to_datetime_string()}",
+                    "event_id": event_id,
+                }
+            else:
+                ledger.release(professional, appointment_dt, owner)
+                results[index] = {"status": "error", "message": f"Erro ao criar o agendamento em {appointment_dt.to_datetime_string()}: {error}"}
+
+        logger.info(f"Bulk scheduling of {self.name}: {sum(1 for r in results if r['status'] == 'success')}/{len(results)} booked")
+        return results
+
+
+def _normalize_name(text: str) -> str:
+    # Case, accent and punctuation insensitive form used by the name index
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", unidecode(text.lower())).split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Catalog versions are never reused, unlike the ids of replaced Services objects
+_catalog_versions = itertools.count(1)
+
 
 class Services:
     """
     Container class to manage multiple Service instances.
     Loads services configuration from a YAML file.
     """
+    # Minimum trigram similarity for a fuzzy match to be considered
+    FUZZY_THRESHOLD = 0.35
+
     def __init__(self, config_path: str = settings.SERVICES_FILE) -> None:
         # Load services configuration from YAML file
         with open(config_path, "r") as f:
             config = yaml.safe_load(f)
         self.services = [Service(s) for s in config.get("services", [])]
+        self.version = next(_catalog_versions)
+        self._build_name_index()
+        self._slot_owners: Optional[List[Tuple[Service, Tuple[int, int]]]] = None
         logger.info(f"Loaded {len(self.services)} services from {config_path}")
 
+    def _build_name_index(self) -> None:
+        """
+        Precomputes normalized names and aliases for get_by_name.
+        Keeps an exact-match dict, a sorted key list for prefix search and a trigram index for fuzzy search.
+        """
+        self._by_name: Dict[str, Service] = {}
+        for service in self.services:
+            for label in [service.name, *service.get_aliases()]:
+                key = _normalize_name(label)
+                if key and key not in self._by_name:
+                    self._by_name[key] = service
+        self._sorted_names = sorted(self._by_name)
+        self._max_name_tokens = max((len(key.split()) for key in self._by_name), default=0)
+        self._trigram_sizes: Dict[str, int] = {}
+        self._trigram_index: Dict[str, List[str]] = {}
+        for key in self._by_name:
+            grams = _trigrams(key)
+            self._trigram_sizes[key] = len(grams)
+            for gram in grams:
+                self._trigram_index.setdefault(gram, []).append(key)
+
     def get_all(self) -> List[Service]:
         # Return list of all Service instances
         return self.services
 
+    def search(self, name: str, limit: int = 5) -> List[Tuple[Service, float]]:
+        """
+        Returns up to `limit` candidate services for a query, best first, with a score in [0, 1].
+        Tries an exact match, then a service name mentioned in the query, then prefixes, then trigram similarity.
+        """
+        query = _normalize_name(name)
+        if not query:
+            return []
+        exact = self._by_name.get(query)
+        if exact is not None:
+            return [(exact, 1.0)]
+
+        scores: Dict[str, float] = {}
+        # Service names or aliases mentioned inside a longer query, e.g. "consulta de fisioterapia"
+        tokens = query.split()
+        for size in range(min(self._max_name_tokens, len(tokens)), 0, -1):
+            for i in range(len(tokens) - size + 1):
+                key = " ".join(tokens[i:i + size])
+                if key in self._by_name:
+                    scores.setdefault(key, 0.95)
+        # Names starting with the query, e.g. "fisio"
+        position = bisect_left(self._sorted_names, query)
+        while position < len(self._sorted_names) and self._sorted_names[position].startswith(query):
+            scores.setdefault(self._sorted_names[position], 0.9)
+            position += 1
+        if not scores:
+            query_grams = _trigrams(query)
+            shared: Dict[str, int] = {}
+            for gram in query_grams:
+                for key in self._trigram_index.get(gram, ()):
+                    shared[key] = shared.get(key, 0) + 1
+            for key, common in shared.items():
+                similarity = common / (len(query_grams) + self._trigram_sizes[key] - common)
+                if similarity >= self.FUZZY_THRESHOLD:
+                    scores[key] = round(similarity * 0.85, 3)
+
+        # Keep the best score per service, as aliases share a service
+        best: Dict[int, Tuple[Service, float]] = {}
+        for key, score in scores.items():
+            service = self._by_name[key]
+            if id(service) not in best or best[id(service)][1] < score:
+                best[id(service)] = (service, score)
+        return sorted(best.values(), key=lambda item: item[1], reverse=True)[:limit]
+
     def get_by_name(self, name: str) -> Optional[Service]:
         """
-        Find and return a Service instance by name.
-        Uses unidecode normalization for case-insensitive and accent-insensitive matching.
+        Find and return a Service instance by name or alias.
+        Matching is case, accent and punctuation insensitive. Returns None when no
+        service matches or when the best candidates are tied, instead of guessing.
         """
-        normalized_query = unidecode(name.lower())
-        for service in self.services:
-            normalized_service = unidecode(service.name.lower())
-            if normalized_query in normalized_service or normalized_service in normalized_query:
-                logger.debug(f"Service found for query '{name}': {service.name}")
-                return service
-        logger.warning(f"No service found for query '{name}'")
-        return None
\ No newline at end of file
+        candidates = self.search(name, limit=2)
+        if not candidates:
+            logger.warning(f"No service found for query '{name}'")
+            return None
+        if len(candidates) > 1 and candidates[0][1] == candidates[1][1]:
+            logger.warning(f"Ambiguous service query '{name}': {[service.name for service, _ in candidates]}")
+            return None
+        logger.debug(f"Service found for query '{name}': {candidates[0][0].name}")
+        return candidates[0][0]
+
+    def suggest(self, name: str, limit: int = 3) -> List[str]:
+        # Names of the closest services, used to ask the user to disambiguate
+        return [service.name for service, _ in self.search(name, limit)]
+
+    def _build_slot_index(self) -> None:
+        # Recurring slots of every service concatenated, built on the first catalog-wide search
+        owners = [(service, key) for service in self.services for key in service._slot_keys]
+        self._slot_arrays = _slot_arrays([key for _, key in owners], [service.get_duration() or 0 for service, _ in owners])
+        self._slot_owners = owners
+
+    def find_earliest_slots(self, limit: int = 10, offset: int = 0, horizon_weeks: Optional[int] = None, availability: Optional[AvailabilityIndex] = None, owner: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Returns the earliest free slots of any service over the coming weeks, across all professionals.
+        One calendar fetch covers the whole horizon; results are sorted by start time and paginated.
+        """
+        if self._slot_owners is None:
+            self._build_slot_index()
+        owners = self._slot_owners
+        held = hold_ledger.get().taken(exclude_owner=owner)
+        skip = (lambda slot, start: not owners[slot][0]._unheld_professionals(owners[slot][1], start, held)) if held else None
+        found = _earliest_free(*self._slot_arrays, offset, limit, horizon_weeks, availability, skip)
+        return [owners[slot][0]._format_occurrence(owners[slot][1], start, held) for slot, start in found]
+
+
+class ServiceCatalog:
+    """
+    Process-wide holder of the Services loaded from one YAML file.
+    Reloads atomically when the file's mtime changes; callers keep the instance they already hold.
+    """
+    def __init__(self, config_path: str, check_interval: float = settings.SERVICES_RELOAD_INTERVAL) -> None:
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self._services: Optional[Services] = None
+        self._mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Services:
+        """Return the current catalog, picking up file changes at most once per check_interval."""
+        services = self._services
+        if services is None:
+            return self.reload()
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return services
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Could not stat services file {self.config_path}: {e}")
+            return services
+        # Only one caller reloads; the others keep serving the current catalog meanwhile
+        if mtime != self._mtime and self._lock.acquire(blocking=False):
+            try:
+                self._reload(mtime)
+            except Exception as e:
+                logger.error(f"Failed to reload services from {self.config_path}, keeping previous catalog: {e}")
+                # Do not retry a broken file until it changes again
+                self._mtime = mtime
+            finally:
+                self._lock.release()
+        return self._services
+
+    def reload(self) -> Services:
+        """Load the YAML file again and swap the catalog in."""
+        with self._lock:
+            self._reload(os.stat(self.config_path).st_mtime_ns)
+        return self._services
+
+    def _reload(self, mtime: int) -> None:
+        started = time.perf_counter()
+        services = Services(self.config_path)
+        self._mtime = mtime
+        self._services = services
+        professionals = sum(len(service.get_professionals()) for service in services.get_all())
+        logger.info(
+            f"Service catalog loaded from {self.config_path} in {(time.perf_counter() - started) * 1000:.1f} ms: "
+            f"{len(services.get_all())} services, {professionals} professionals"
+        )
+
+
+_catalogs: Dict[str, ServiceCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def _get_catalog(config_path: str) -> ServiceCatalog:
+    with _catalogs_lock:
+        catalog = _catalogs.get(config_path)
+        if catalog is None:
+            catalog = _catalogs[config_path] = ServiceCatalog(config_path)
+        return catalog
+
+
+def get_services(config_path: str = settings.SERVICES_FILE) -> Services:
+    """Return the shared Services instance for config_path, loading it on first use."""
+    return _get_catalog(config_path).get()
+
+
+def reload_services(config_path: str = settings.SERVICES_FILE) -> Services:
+    """Force the shared catalog for config_path to be reloaded from disk."""
+    return _get_catalog(config_path).reload()
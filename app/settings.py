@@ -8,15 +8,40 @@ from dataclasses import dataclass, field
 @dataclass
 class Settings:
     LLM_API_KEY: str = field(default=os.getenv("LLM_API_KEY"))
-    TIMEZONE: str = field(default=os.getenv("TIMEZONE"))
+    TIMEZONE: str = field(default=os.getenv("TIMEZONE", "America/Sao_Paulo"))
     GOOGLE_CALENDAR_ID: str = field(default=os.getenv("GOOGLE_CALENDAR_ID"))
     SCOPES: list[str] = field(default_factory=lambda: ["https://www.googleapis.com/auth/calendar"])
     GOOGLE_CREDENTIALS_FILE: str = field(default=os.getenv("GOOGLE_CREDENTIALS_FILE"))
     TELEGRAM_BOT_TOKEN: str = field(default=os.getenv("TELEGRAM_BOT_TOKEN"))
+    TELEGRAM_MAX_CONCURRENCY: int = field(default=int(os.getenv("TELEGRAM_MAX_CONCURRENCY", "32")))
+    TELEGRAM_MAX_QUEUE_PER_USER: int = field(default=int(os.getenv("TELEGRAM_MAX_QUEUE_PER_USER", "5")))
+    TELEGRAM_MAX_PENDING: int = field(default=int(os.getenv("TELEGRAM_MAX_PENDING", "1000")))
+    TELEGRAM_EDIT_INTERVAL: float = field(default=float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1")))
     LOG_LEVEL: str = field(default=os.getenv("LOG_LEVEL", "INFO"))
     LOG_FILE: str = field(default=os.getenv("LOG_FILE", "app.log"))
+    CHECKPOINT_DB: str = field(default=os.getenv("CHECKPOINT_DB", "data/checkpoints.sqlite"))
+    HOLDS_DB: str = field(default=os.getenv("HOLDS_DB", "data/holds.sqlite"))
+    HOLD_TTL: float = field(default=float(os.getenv("HOLD_TTL", "300")))
     SESSIONS_FILE: str = field(default=os.getenv("SESSIONS_FILE", "data/sessions.json"))
     SERVICES_FILE: str = field(default=os.getenv("SERVICES_FILE", "data/services.yaml"))
+    SLOT_SEARCH_HORIZON_WEEKS: int = field(default=int(os.getenv("SLOT_SEARCH_HORIZON_WEEKS", "8")))
+    SERVICES_RELOAD_INTERVAL: float = field(default=float(os.getenv("SERVICES_RELOAD_INTERVAL", "1")))
+    CALENDAR_CACHE_TTL: float = field(default=float(os.getenv("CALENDAR_CACHE_TTL", "60")))
+    CALENDAR_CACHE_SIZE: int = field(default=int(os.getenv("CALENDAR_CACHE_SIZE", "128")))
+    CALENDAR_MAX_CONCURRENCY: int = field(default=int(os.getenv("CALENDAR_MAX_CONCURRENCY", "8")))
+    CALENDAR_TIMEOUT: float = field(default=float(os.getenv("CALENDAR_TIMEOUT", "10")))
+    CALENDAR_BATCH_SIZE: int = field(default=int(os.getenv("CALENDAR_BATCH_SIZE", "50")))
+    CALENDAR_MAX_ATTEMPTS: int = field(default=int(os.getenv("CALENDAR_MAX_ATTEMPTS", "3")))
+    CALENDAR_HEDGE_DELAY: float = field(default=float(os.getenv("CALENDAR_HEDGE_DELAY", "0")))
+    LLM_MAX_ATTEMPTS: int = field(default=int(os.getenv("LLM_MAX_ATTEMPTS", "3")))
+    LLM_HEDGE_DELAY: float = field(default=float(os.getenv("LLM_HEDGE_DELAY", "0")))
+    RETRY_BASE_DELAY: float = field(default=float(os.getenv("RETRY_BASE_DELAY", "0.2")))
+    RETRY_MAX_DELAY: float = field(default=float(os.getenv("RETRY_MAX_DELAY", "5")))
+    CIRCUIT_FAILURE_THRESHOLD: int = field(default=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")))
+    CIRCUIT_RESET_TIMEOUT: float = field(default=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")))
+    CALENDAR_INCREMENTAL_SYNC: bool = field(default=os.getenv("CALENDAR_INCREMENTAL_SYNC", "false").lower() == "true")
+    TELEMETRY_ENABLED: bool = field(default=os.getenv("TELEMETRY_ENABLED", "false").lower() == "true")
+    METRICS_PORT: int = field(default=int(os.getenv("METRICS_PORT", "9464")))
 
 settings = Settings()
 
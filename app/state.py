@@ -15,11 +15,19 @@ class InputState:
         default_factory=list
     )
 
+    # Running summary of the messages before summarized_count, updated incrementally.
+    # Part of the input so frontends without a checkpointer can pass it back on the next turn.
+    summary: Optional[str] = None
+    summarized_count: int = 0
+
 
 @dataclass
 class State(InputState):
     is_last_step: IsLastStep = field(default=False)
 
+    # Model calls made for the current user message; reset when a new turn starts
+    attempts: int = 0
+
     intent: Optional[str] = None
     user_full_name: Optional[str] = None
     service_name: Optional[str] = None
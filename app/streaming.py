@@ -0,0 +1,58 @@
+"""Streaming of agent replies for the frontends."""
+
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Literal, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+
+from app.telemetry import FIRST_TOKEN_LATENCY
+from app.utils import get_message_text
+
+# Status shown to the user while a tool runs
+TOOL_STATUS = {
+    "list_services": "Consultando os serviços disponíveis…",
+    "get_available_slots": "Verificando disponibilidade…",
+    "get_slots_for_professional": "Verificando disponibilidade…",
+    "find_earliest_slots": "Procurando os próximos horários livres…",
+    "hold_slot": "Reservando o horário…",
+    "schedule_appointment": "Agendando sua consulta…",
+}
+DEFAULT_STATUS = "Processando…"
+FALLBACK_REPLY = "Desculpe, não entendi sua solicitação."
+
+
+@dataclass
+class StreamUpdate:
+    """
+    One step of a streamed reply.
+    kind is "status" for tool progress, "token" for a chunk of the answer and "final" for the complete answer.
+    """
+    kind: Literal["status", "token", "final"]
+    text: str
+
+
+async def stream_reply(agent: CompiledStateGraph, input: Any, config: Optional[RunnableConfig] = None) -> AsyncIterator[StreamUpdate]:
+    """Run one turn of the agent, yielding tool status and answer tokens as they are produced."""
+    final_text = None
+    started = time.perf_counter()
+    first_token = True
+    async for event in agent.astream_events(input, config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream" and event["metadata"].get("langgraph_node") == "call_model":
+            text = get_message_text(event["data"]["chunk"])
+            if text:
+                if first_token:
+                    FIRST_TOKEN_LATENCY.observe(time.perf_counter() - started)
+                    first_token = False
+                yield StreamUpdate("token", text)
+        elif kind == "on_tool_start":
+            yield StreamUpdate("status", TOOL_STATUS.get(event["name"], DEFAULT_STATUS))
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            # The root run carries the final state; its last AI message is the answer
+            messages = (event["data"].get("output") or {}).get("messages", [])
+            if messages and isinstance(messages[-1], AIMessage):
+                final_text = get_message_text(messages[-1])
+    yield StreamUpdate("final", final_text or FALLBACK_REPLY)
@@ -0,0 +1,307 @@
+"""
+Lightweight tracing and Prometheus metrics for graph nodes, tools and calendar I/O.
+When TELEMETRY_ENABLED is false, spans and metric updates are no-ops.
+"""
+
+import bisect
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import logging
+from app.settings import settings
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = settings.TELEMETRY_ENABLED
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def configure(enabled: bool) -> None:
+    """Turn instrumentation on or off at runtime, e.g. from tests or a frontend entry point."""
+    global _enabled
+    _enabled = enabled
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        if not _enabled:
+            return
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        return self._values.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {value:g}" for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not _enabled:
+            return
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][position] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        entry = self._values.get(key)
+        return entry[2] if entry else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def collect(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip([*self.buckets, float("inf")], counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_format_labels((*self.labelnames, 'le'), (*key, le))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Registry:
+    """Holds every metric and renders them in the Prometheus text exposition format."""
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+
+    def register(self, metric: Any) -> None:
+        self._metrics[metric.name] = metric
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+SPAN_DURATION = Histogram("nexia_span_duration_seconds", "Duration of instrumented operations.", ("span", "status"))
+LLM_TOKENS = Counter("nexia_llm_tokens_total", "Tokens reported by the chat model.", ("model", "kind"))
+TOOL_CALLS = Counter("nexia_tool_calls_total", "Tool invocations by outcome.", ("tool", "status"))
+LLM_LATENCY = Histogram("nexia_llm_latency_seconds", "Chat model call latency.", ("model", "route"))
+MODEL_ROUTES = Counter("nexia_model_routes_total", "ReAct steps by the model tier that answered them and why.", ("route", "reason"))
+PROMPT_CACHE_RATIO = Histogram("nexia_llm_prompt_cache_ratio", "Share of prompt tokens served from the provider's prompt cache.", ("model",), buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0))
+FIRST_TOKEN_LATENCY = Histogram("nexia_reply_first_token_seconds", "Time from a user message to the first streamed answer token.")
+DISPATCHER_QUEUE_WAIT = Histogram("nexia_dispatcher_queue_wait_seconds", "Time a message waited in the dispatcher before its turn started.")
+DISPATCHER_BACKLOG = Histogram("nexia_dispatcher_backlog_messages", "Messages already pending in the dispatcher when a new one arrives.", buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+DISPATCHER_MESSAGES = Counter("nexia_dispatcher_messages_total", "Messages submitted to the dispatcher, queued or rejected as busy.", ("result",))
+CALENDAR_REQUESTS = Counter("nexia_calendar_requests_total", "Requests sent to the Google Calendar API.", ("operation", "status"))
+RETRIES = Counter("nexia_retries_total", "Retried calls to external dependencies.", ("operation",))
+CIRCUIT_TRANSITIONS = Counter("nexia_circuit_transitions_total", "Circuit breaker state changes.", ("circuit", "state"))
+HEDGED_REQUESTS = Counter("nexia_hedged_requests_total", "Hedged requests by the call that answered first.", ("operation", "winner"))
+CALENDAR_CACHE = Counter("nexia_calendar_cache_total", "Calendar event cache lookups.", ("result",))
+
+
+def render_prometheus() -> str:
+    return registry.render()
+
+
+class Span:
+    """A timed operation with attributes; nested spans share the trace id of their parent."""
+    __slots__ = ("name", "attributes", "trace_id", "span_id", "parent_id", "start", "end", "status")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"]) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        # For errors that are handled inside the span and never propagate out of it
+        self.status = "error"
+        self.attributes["error"] = type(error).__name__
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+class _NoopContext:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return NOOP_SPAN
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = _NoopContext()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# Finished spans, newest last, for inspection and tests
+recent_spans: Deque[Span] = deque(maxlen=1000)
+_span_processors: List[Callable[[Span], None]] = []
+
+
+def add_span_processor(processor: Callable[[Span], None]) -> None:
+    """Register a callback receiving every finished span, e.g. to forward it to an external tracer."""
+    _span_processors.append(processor)
+
+
+class _SpanContext:
+    __slots__ = ("_span", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        self._span = Span(name, attributes, _current_span.get())
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        span = self._span
+        span.end = time.perf_counter()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            span.status = "error"
+            span.attributes.setdefault("error", exc_type.__name__)
+        SPAN_DURATION.observe(span.duration, span=span.name, status=span.status)
+        recent_spans.append(span)
+        logger.debug(f"span {span.name} {span.duration * 1000:.1f} ms status={span.status} {span.attributes}")
+        for processor in _span_processors:
+            try:
+                processor(span)
+            except Exception:
+                logger.exception("Span processor failed")
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager timing an operation as a span, nested under the current span of this context.
+    Returns a shared no-op span when telemetry is disabled.
+    """
+    if not _enabled:
+        return _NOOP_CONTEXT
+    return _SpanContext(name, attributes)
+
+
+def current_span() -> Any:
+    return _current_span.get() or NOOP_SPAN
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"metrics endpoint: {format % args}")
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics in Prometheus text format from a daemon thread, once per process.
+    Does nothing when telemetry is disabled.
+    """
+    global _server
+    if not _enabled or _server is not None:
+        return _server
+    _server = ThreadingHTTPServer((host, port if port is not None else settings.METRICS_PORT), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{_server.server_address[1]}/metrics")
+    return _server
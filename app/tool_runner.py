@@ -0,0 +1,107 @@
+"""Concurrent execution of the tool calls requested by the model."""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional
+
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langchain_core.tools import tool as create_tool
+
+import logging
+from app.settings import settings
+from app.telemetry import TOOL_CALLS, span
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+# Recent latencies per tool in seconds, used for percentiles
+_latencies: Dict[str, Deque[float]] = {}
+
+
+def record_latency(name: str, seconds: float) -> None:
+    _latencies.setdefault(name, deque(maxlen=1000)).append(seconds)
+
+
+def get_tool_latency_stats() -> Dict[str, Dict[str, float]]:
+    """Return count, p50, p95 and max latency in seconds for every tool that has run."""
+    stats = {}
+    for name, latencies in _latencies.items():
+        values = sorted(latencies)
+        stats[name] = {
+            "count": len(values),
+            "p50": values[int(0.50 * (len(values) - 1))],
+            "p95": values[int(0.95 * (len(values) - 1))],
+            "max": values[-1],
+        }
+    return stats
+
+
+def _result_count(output: Any) -> Optional[int]:
+    # Number of results a tool returned: a list, or a paginated {"total": ...} / {"slots": [...]} payload
+    if isinstance(output, list):
+        return len(output)
+    if isinstance(output, dict):
+        if isinstance(output.get("total"), int):
+            return output["total"]
+        if isinstance(output.get("slots"), list):
+            return len(output["slots"])
+    return None
+
+
+class ToolRunner:
+    """
+    Runs every tool call of an AIMessage concurrently, each with its own timeout (None waits for completion).
+    Timeouts and errors become structured ToolMessages the model can reason about.
+    """
+    def __init__(self, tools: List[Any]) -> None:
+        converted = [tool if isinstance(tool, BaseTool) else create_tool(tool) for tool in tools]
+        self.tools_by_name: Dict[str, BaseTool] = {tool.name: tool for tool in converted}
+
+    async def run(self, tool_calls: List[ToolCall], config: RunnableConfig, default_timeout: float, timeouts: Mapping[str, Optional[float]]) -> List[ToolMessage]:
+        return list(await asyncio.gather(*(
+            self._run_one(call, config, timeouts.get(call["name"], default_timeout)) for call in tool_calls
+        )))
+
+    async def _run_one(self, call: ToolCall, config: RunnableConfig, timeout: Optional[float]) -> ToolMessage:
+        name = call["name"]
+        tool = self.tools_by_name.get(name)
+        if tool is None:
+            TOOL_CALLS.inc(tool=name, status="unknown")
+            return self._error(call, "error", f"Tool '{name}' does not exist. Available tools: {', '.join(self.tools_by_name)}.")
+
+        with span("tool", tool=name, service=call["args"].get("service_name")) as current:
+            started = time.perf_counter()
+            try:
+                output = await asyncio.wait_for(tool.ainvoke(call["args"], config), timeout)
+            except asyncio.TimeoutError as e:
+                logger.warning(f"Tool {name} timed out after {timeout:.1f}s")
+                TOOL_CALLS.inc(tool=name, status="timeout")
+                current.record_error(e)
+                return self._error(call, "timeout", f"A ferramenta {name} não respondeu em {timeout:g} segundos. Tente novamente ou ofereça outra opção ao usuário.", timeout_seconds=timeout)
+            except Exception as e:
+                logger.exception(f"Tool {name} failed")
+                TOOL_CALLS.inc(tool=name, status="error")
+                current.record_error(e)
+                return self._error(call, "error", f"Erro ao executar {name}: {e}")
+            finally:
+                elapsed = time.perf_counter() - started
+                record_latency(name, elapsed)
+                logger.info(f"Tool {name} finished in {elapsed * 1000:.0f} ms")
+
+            TOOL_CALLS.inc(tool=name, status="ok")
+            results = _result_count(output)
+            if results is not None:
+                current.set_attribute("results", results)
+            if isinstance(output, dict) and "status" in output:
+                current.set_attribute("result_status", output["status"])
+
+        content = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+        return ToolMessage(content=content, name=name, tool_call_id=call["id"])
+
+    def _error(self, call: ToolCall, status: str, message: str, **details: Any) -> ToolMessage:
+        content = json.dumps({"status": status, "tool": call["name"], "message": message, **details}, ensure_ascii=False)
+        return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
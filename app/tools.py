@@ -1,12 +1,95 @@
-from typing import Any, Callable, List
+from typing import Any, Callable, Dict, List, Optional
+import pendulum
+from langgraph.config import get_config
+from app.calendar import run_in_calendar_pool
 from app.configuration import Configuration
+from app.memo import memoize, tool_cache
+from app.utils import DAY_MAP
 import logging
 from app.settings import settings
 
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+# Tools whose results depend on calendar availability
+SLOT_TOOLS = {"get_available_slots", "get_slots_for_professional", "find_earliest_slots"}
+# Tools that write to the calendar or the hold ledger; they run to completion instead of being cut off by a timeout
+WRITE_TOOLS = {"hold_slot", "schedule_appointment"}
+# Results per page of find_earliest_slots
+EARLIEST_PAGE_SIZE = 10
+# Slots per page of the slot listings
+SLOTS_PAGE_SIZE = 20
 
+
+# Catalog version the process-scoped cache entries were last computed from
+_catalog_version: Optional[int] = None
+
+
+def _catalog_key() -> int:
+    # Cached results belong to the catalog version they were computed from
+    global _catalog_version
+    version = Configuration.from_context().services.version
+    if version != _catalog_version:
+        # The catalog was replaced, so entries computed from older versions can never be hit again
+        if _catalog_version is not None:
+            dropped = tool_cache.invalidate("process", lambda key: key[-1] != version)
+            logger.info(f"Service catalog changed, dropped {dropped} cached tool results")
+        _catalog_version = version
+    return version
+
+
+def _unknown_service(services: Any, service_name: str) -> dict[str, Any]:
+    # Unknown and ambiguous names alike, so the model asks instead of reporting no availability
+    return {"status": "error", "message": f"Serviço '{service_name}' não encontrado.", "suggestions": services.suggest(service_name)}
+
+
+def _owner(user_name: Optional[str] = None) -> Optional[str]:
+    # Slot holds belong to the conversation, so a user's own holds never hide slots from them
+    try:
+        thread_id = (get_config().get("configurable") or {}).get("thread_id")
+    except RuntimeError:
+        thread_id = None
+    return str(thread_id) if thread_id is not None else user_name
+
+
+def _resolve_from_day(from_day: Optional[str]) -> Optional[str]:
+    # Weekday name (next occurrence, like bookings) or YYYY-MM-DD, as a date string
+    if not from_day:
+        return None
+    weekday = DAY_MAP.get(from_day.strip().lower())
+    if weekday is not None:
+        return pendulum.now(settings.TIMEZONE).next(weekday).to_date_string()
+    try:
+        return pendulum.parse(from_day.strip()).to_date_string()
+    except Exception:
+        return None
+
+
+def paginate_slots(slots: List[Dict[str, str]], limit: Optional[int], offset: int = 0, from_day: Optional[str] = None, compact: bool = True) -> Dict[str, Any]:
+    """
+    Orders slots chronologically and returns one page of them.
+    The compact form groups start times by professional and day, so names are not repeated per slot;
+    has_more and next_offset tell the model how to ask for the rest.
+    """
+    start_date = _resolve_from_day(from_day)
+    ordered = sorted(
+        (slot for slot in slots if start_date is None or slot["date"] >= start_date),
+        key=lambda slot: (slot["date"], slot["slot"], slot["professional"]),
+    )
+    offset = max(offset, 0)
+    page = ordered[offset:offset + limit] if limit is not None else ordered[offset:]
+    result: Dict[str, Any] = {"total": len(ordered), "offset": offset, "has_more": offset + len(page) < len(ordered)}
+    if result["has_more"]:
+        result["next_offset"] = offset + len(page)
+    if not compact:
+        return {"slots": page, **result}
+    grouped: Dict[str, Dict[str, List[str]]] = {}
+    for slot in page:
+        grouped.setdefault(slot["professional"], {}).setdefault(slot["day"], []).append(slot["slot"].split("-")[0])
+    return {"slots": grouped, **result}
+
+
+@memoize("process", extra_key=_catalog_key)
 async def list_services() -> List[str]:
     """List available services."""
     configuration = Configuration.from_context()
@@ -14,36 +97,83 @@ async def list_services() -> List[str]:
     logger.info("Listing available services")
     return [service.get_name() for service in services]
 
-async def get_available_slots(service_name: str) -> List[dict[str, Any]]:
-    """Get available slots for a service."""
+@memoize("turn", extra_key=_catalog_key)
+async def get_available_slots(service_name: str, limit: Optional[int] = SLOTS_PAGE_SIZE, offset: int = 0, from_day: Optional[str] = None, compact: bool = True) -> dict[str, Any]:
+    """Get available slots for a service in the coming week, as start times grouped by professional and day. from_day (weekday name or YYYY-MM-DD) skips earlier days; use next_offset as offset for more."""
     configuration = Configuration.from_context()
     services = configuration.services
     service = services.get_by_name(service_name)
     logger.info(f"Getting available slots for service: {service_name}")
     if not service:
-        return []
-    return service.get_available_slots()
+        return _unknown_service(services, service_name)
+    slots = await run_in_calendar_pool(service.get_available_slots, _owner())
+    return {"duration_minutes": service.get_duration(), **paginate_slots(slots, limit, offset, from_day, compact)}
 
-async def get_slots_for_professional(service_name: str, professional_name: str) -> List[dict[str, Any]]:
-    """Get available slots for a service."""
+@memoize("turn", extra_key=_catalog_key)
+async def get_slots_for_professional(service_name: str, professional_name: str, limit: Optional[int] = SLOTS_PAGE_SIZE, offset: int = 0, from_day: Optional[str] = None, compact: bool = True) -> dict[str, Any]:
+    """Get available slots of one professional for a service in the coming week, grouped by day. from_day (weekday name or YYYY-MM-DD) skips earlier days; use next_offset as offset for more."""
     configuration = Configuration.from_context()
     services = configuration.services
     service = services.get_by_name(service_name)
     logger.info(f"Getting available slots for service: {service_name} and professional: {professional_name}")
     if not service:
-        return []
-    return service.get_slots_for_professional(professional_name)
+        return _unknown_service(services, service_name)
+    slots = await run_in_calendar_pool(service.get_slots_for_professional, professional_name, owner=_owner())
+    return {"duration_minutes": service.get_duration(), **paginate_slots(slots, limit, offset, from_day, compact)}
+
+@memoize("turn", extra_key=_catalog_key)
+async def find_earliest_slots(service_name: Optional[str] = None, page: int = 1) -> dict[str, Any]:
+    """Find the earliest available slots in the coming weeks for a service, or for any service when no name is given. Use page for more results."""
+    configuration = Configuration.from_context()
+    services = configuration.services
+    page = max(page, 1)
+    offset = (page - 1) * EARLIEST_PAGE_SIZE
+    logger.info(f"Searching earliest slots for service: {service_name or 'any'}, page {page}")
+    if service_name:
+        service = services.get_by_name(service_name)
+        if not service:
+            return _unknown_service(services, service_name)
+        search = service.find_earliest_slots
+    else:
+        search = services.find_earliest_slots
+    # One extra result tells whether another page exists
+    slots = await run_in_calendar_pool(search, EARLIEST_PAGE_SIZE + 1, offset, owner=_owner())
+    return {"slots": slots[:EARLIEST_PAGE_SIZE], "page": page, "has_more": len(slots) > EARLIEST_PAGE_SIZE}
 
-async def schedule_appointment(user_name: str, service_name: str, day: str, time: str) -> dict[str, Any]:
-    """Attempt to schedule an appointment."""
+async def schedule_appointment(user_name: str, service_name: str, day: str, time: str, professional_name: Optional[str] = None) -> dict[str, Any]:
+    """Attempt to schedule an appointment. day is a weekday name (next occurrence) or a date (YYYY-MM-DD). After hold_slot, pass the professional it returned."""
     configuration = Configuration.from_context()
     service = configuration.services.get_by_name(service_name)
     if not service:
         logger.warning(f"Service '{service_name}' not found for user '{user_name}'")
-        return {"status": "error", "message": f"Serviço '{service_name}' não encontrado."}
+        suggestions = configuration.services.suggest(service_name)
+        message = f"Serviço '{service_name}' não encontrado."
+        if suggestions:
+            message += f" Opções próximas: {', '.join(suggestions)}."
+        return {"status": "error", "message": message}
     else:
         logger.info(f"Scheduling appointment for user: {user_name}, service: {service_name}, day: {day}, time: {time}")
-    result = service.schedule(user_name, day, time)
+    result = await run_in_calendar_pool(service.schedule, user_name, day, time, professional_name, owner=_owner(user_name), write=True)
+    if result.get("status") == "success":
+        # Every service shares the calendar, so all slot listings of this turn are now stale
+        dropped = tool_cache.invalidate("turn", lambda key: key[0] in SLOT_TOOLS)
+        logger.debug(f"Invalidated {dropped} cached slot results after booking")
     return result
 
-TOOLS: List[Callable[..., Any]] = [list_services, get_available_slots, get_slots_for_professional, schedule_appointment]
\ No newline at end of file
+async def hold_slot(service_name: str, day: str, time: str, professional_name: Optional[str] = None) -> dict[str, Any]:
+    """Reserve a slot for a few minutes while the user confirms, so nobody else can book it. day is a weekday name or a date (YYYY-MM-DD)."""
+    configuration = Configuration.from_context()
+    service = configuration.services.get_by_name(service_name)
+    if not service:
+        return _unknown_service(configuration.services, service_name)
+    owner = _owner()
+    if owner is None:
+        return {"status": "error", "message": "Não foi possível identificar a conversa para reservar o horário."}
+    logger.info(f"Holding {service_name} on {day} at {time} for {owner}")
+    # A hold taken after a reported timeout would block the slot for everyone until it expires
+    professional = await run_in_calendar_pool(service.hold, day, time, owner, professional_name, write=True)
+    if professional is None:
+        return {"status": "unavailable", "message": f"O horário {day} às {time} não está mais disponível para {service_name}."}
+    return {"status": "held", "professional": professional, "expires_in_seconds": int(settings.HOLD_TTL)}
+
+TOOLS: List[Callable[..., Any]] = [list_services, get_available_slots, get_slots_for_professional, find_earliest_slots, hold_slot, schedule_appointment]
\ No newline at end of file
@@ -1,11 +1,21 @@
 """Utility & helper functions."""
 
-from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import BaseMessage
-from langchain_core.messages import AIMessage, HumanMessage
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Tuple
+
+import logging
 import pendulum
 
+if TYPE_CHECKING:
+    # Only needed for annotations; importing langchain here would slow down app.services
+    from langchain_core.language_models import BaseChatModel, LanguageModelInput
+    from langchain_core.messages import BaseMessage
+    from langchain_core.runnables import Runnable
+
+logger = logging.getLogger(__name__)
+
 
 DAY_MAP = {
         "segunda-feira": pendulum.MONDAY, "lunes": pendulum.MONDAY,
@@ -19,6 +29,8 @@ DAY_MAP = {
 
 
 def convert_history_to_messages(history):
+    from langchain_core.messages import AIMessage, HumanMessage
+
     messages = []
     for role, text in history:
         if role == "Usuário":
@@ -46,5 +58,31 @@ def load_chat_model(fully_specified_name: str, api_key: str) -> BaseChatModel:
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
     """
+    # langchain's provider registry is slow to import and only needed once a model is built
+    from langchain.chat_models import init_chat_model
+
     provider, model = fully_specified_name.split("/", maxsplit=1)
-    return init_chat_model(model, model_provider=provider, api_key=api_key)
\ No newline at end of file
+    # Retries happen in app.graph, where they are bounded by LLM_MAX_ATTEMPTS and seen by the circuit breaker
+    return init_chat_model(model, model_provider=provider, api_key=api_key, max_retries=0)
+
+
+@lru_cache(maxsize=16)
+def load_bound_chat_model(fully_specified_name: str, api_key: str, tools: Tuple[Callable[..., Any], ...]) -> Runnable[LanguageModelInput, BaseMessage]:
+    """Load a chat model with tools bound, reusing the client per (model, API key, tool set).
+
+    Reusing the client keeps its HTTP connection pool and the serialized tool schemas
+    across ReAct steps and conversations.
+
+    Args:
+        fully_specified_name (str): String in the format 'provider/model'.
+        tools (tuple): Tools to bind; must be hashable so it can be part of the cache key.
+    """
+    constructed = load_bound_chat_model.cache_info().misses
+    logger.info(f"Constructing chat model client for {fully_specified_name} with {len(tools)} tools (client #{constructed})")
+    model = load_chat_model(fully_specified_name, api_key=api_key)
+    return model.bind_tools(list(tools)) if tools else model
+
+
+def get_chat_model_cache_info():
+    """Return lru_cache statistics of bound chat models; misses is the number of clients constructed."""
+    return load_bound_chat_model.cache_info()
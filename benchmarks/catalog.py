@@ -0,0 +1,43 @@
+"""Synthetic service catalogs of configurable size."""
+
+import os
+import tempfile
+from typing import Dict, List
+
+import yaml
+
+DAYS = ["segunda-feira", "terça-feira", "quarta-feira", "quinta-feira", "sexta-feira", "sábado"]
+BLOCKS = [["09:00-12:00", "14:00-18:00"], ["08:00-12:00"], ["13:00-17:00", "18:00-20:00"]]
+
+
+def build_catalog(services: int, professionals_per_service: int) -> Dict[str, List[dict]]:
+    """Deterministic catalog; professional i of service s works on two weekdays with multi-block days."""
+    catalog = []
+    for s in range(services):
+        professionals = []
+        for p in range(professionals_per_service):
+            professionals.append({
+                "name": f"Profissional {s}-{p}",
+                "availability": [
+                    {"day": DAYS[(s + p + offset) % len(DAYS)], "slots": BLOCKS[(s + p + offset) % len(BLOCKS)]}
+                    for offset in (0, 2)
+                ],
+            })
+        catalog.append({
+            "name": f"Serviço {s:04d}",
+            "aliases": [f"Service {s:04d}"],
+            "price": 100,
+            "duration": 60,
+            "description": f"Serviço sintético {s}",
+            "professionals": professionals,
+        })
+    return {"services": catalog}
+
+
+def write_catalog(services: int, professionals_per_service: int, directory: str = None) -> str:
+    """Write a synthetic catalog to a YAML file and return its path."""
+    directory = directory or tempfile.mkdtemp(prefix="nexia-bench-")
+    path = os.path.join(directory, f"services-{services}x{professionals_per_service}.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(build_catalog(services, professionals_per_service), f, allow_unicode=True)
+    return path
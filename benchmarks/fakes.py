@@ -0,0 +1,197 @@
+"""Fake Calendar backend and chat models used by the benchmarks."""
+
+import asyncio
+import json
+import threading
+import time
+from itertools import count
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import pendulum
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from app.calendar import event_bounds
+
+
+class _Request:
+    def __init__(self, backend: "FakeCalendar", method: str, handler) -> None:
+        self.backend = backend
+        self.method = method
+        self.handler = handler
+
+    def execute(self) -> Dict[str, Any]:
+        self.backend.record(self.method)
+        time.sleep(self.backend.latency)
+        return self.handler()
+
+
+class _Events:
+    def __init__(self, backend: "FakeCalendar") -> None:
+        self.backend = backend
+
+    def list(self, calendarId: str, syncToken: Optional[str] = None, timeMin: Optional[str] = None, timeMax: Optional[str] = None, **kwargs: Any) -> _Request:
+        def handler() -> Dict[str, Any]:
+            items = self.backend.events if syncToken else self.backend.between(timeMin, timeMax)
+            return {"items": list(items), "nextSyncToken": "sync-token"}
+        return _Request(self.backend, "list", handler)
+
+    def insert(self, calendarId: str, body: Dict[str, Any]) -> _Request:
+        def handler() -> Dict[str, Any]:
+            return self.backend.add(body)
+        return _Request(self.backend, "insert", handler)
+
+
+class FakeCalendar:
+    """
+    In-memory calendar behind FakeCalendarService.
+    Every request sleeps `latency` seconds and is counted per method.
+    """
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.events: List[Dict[str, Any]] = []
+        self.calls: Dict[str, int] = {}
+        self._ids = count(1)
+        self._lock = threading.Lock()
+
+    def record(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_counts(self) -> None:
+        self.calls = {}
+
+    def add(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            event = {**body, "id": f"evt{next(self._ids)}"}
+            self.events.append(event)
+            return event
+
+    def between(self, time_min: Optional[str], time_max: Optional[str]) -> List[Dict[str, Any]]:
+        start, end = pendulum.parse(time_min), pendulum.parse(time_max)
+        return [event for event in self.events if (bounds := event_bounds(event)) and bounds[0] < end and bounds[1] > start]
+
+
+class _Batch:
+    def __init__(self, backend: "FakeCalendar", callback) -> None:
+        self.backend = backend
+        self.callback = callback
+        self.requests: List[tuple] = []
+
+    def add(self, request: _Request, request_id: str) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self) -> None:
+        # The whole batch is a single round-trip
+        self.backend.record("batch")
+        time.sleep(self.backend.latency)
+        for request_id, request in self.requests:
+            self.callback(request_id, request.handler(), None)
+
+
+class FakeCalendarService:
+    """Stands in for the googleapiclient Resource returned by app.calendar._get_service."""
+    def __init__(self, backend: FakeCalendar) -> None:
+        self.backend = backend
+
+    def events(self) -> _Events:
+        return _Events(self.backend)
+
+    def new_batch_http_request(self, callback) -> _Batch:
+        return _Batch(self.backend, callback)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that replays a fixed list of AI messages, optionally after a delay.
+    Supports bind_tools and token streaming so it can drive the full graph.
+    """
+    responses: List[AIMessage]
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _next(self) -> AIMessage:
+        message = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        time.sleep(self.latency)
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        yield from _chunks(self._next())
+
+
+def _chunks(message: AIMessage) -> Iterator[ChatGenerationChunk]:
+    # Word-by-word text chunks followed by the tool calls, like a streaming provider
+    words = message.content.split(" ") if message.content else []
+    for i, word in enumerate(words):
+        yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == len(words) - 1 else f"{word} "))
+    if message.tool_calls:
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+            for i, call in enumerate(message.tool_calls)
+        ]))
+
+
+class PlannedChatModel(BaseChatModel):
+    """
+    Chat model for many concurrent conversations: answers a user message with the tool call planned
+    for its text (or plain text), and answers tool results with a short reply.
+    On the async path the latency is awaited, so thousands of turns can wait at once.
+    """
+    plans: Dict[str, Optional[Dict[str, Any]]] = Field(default_factory=dict)
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "planned"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "PlannedChatModel":
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        # The prompt may end with volatile system context such as the current time
+        last = next((message for message in reversed(messages) if not isinstance(message, SystemMessage)), messages[-1])
+        if isinstance(last, HumanMessage):
+            call = self.plans.get(last.content)
+            if call is not None:
+                return AIMessage(content="", tool_calls=[{**call, "id": f"call-{self.calls}"}])
+            return AIMessage(content="De nada! Se precisar de algo mais, é só chamar.")
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Aqui está o que encontrei: {last.content[:120]}")
+        return AIMessage(content="Como posso ajudar?")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        yield from _chunks(self._respond(messages))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for chunk in _chunks(self._respond(messages)):
+            yield chunk
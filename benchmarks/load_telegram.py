@@ -0,0 +1,247 @@
+"""
+Load generator for the Telegram handler.
+
+    PYTHONPATH=. python -m benchmarks.load_telegram --users 1000 --llm-latency-ms 300 --calendar-latency-ms 50
+
+Simulated users run multi-turn booking conversations through frontend.telegram_app.handle_message,
+with a fake Bot API, a chat model that follows each user's script and a fake Calendar backend.
+Reports throughput, turn latency percentiles, event-loop lag, session store growth and upstream
+calls per turn, i.e. how many concurrent users one bot process carries before it needs to scale out.
+"""
+
+import os
+
+# aiogram validates the token format when telegram_app is imported; no request is ever sent
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:load-test")
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from unittest.mock import patch
+
+from app.holds import HoldLedger, hold_ledger
+from app.graph import build_graph
+from app.services import get_services
+from app.settings import settings
+from benchmarks.fakes import FakeCalendar, FakeCalendarService, PlannedChatModel
+from frontend.dispatcher import ConversationDispatcher, Job
+from frontend.sessions import open_checkpointer
+from frontend.telegram_app import handle_message
+
+Turn = Tuple[str, Optional[Dict[str, Any]]]
+
+
+class FakeBot:
+    """Counts Bot API calls; each one takes `latency` seconds."""
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls: Counter = Counter()
+
+    async def call(self, method: str) -> None:
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send_chat_action(self, chat_id: int, action: Any) -> None:
+        await self.call("sendChatAction")
+
+
+class FakeSentMessage:
+    def __init__(self, bot: FakeBot) -> None:
+        self.bot = bot
+
+    async def edit_text(self, text: str, **kwargs: Any) -> "FakeSentMessage":
+        await self.bot.call("editMessageText")
+        return self
+
+
+class FakeMessage:
+    """The subset of aiogram's Message used by the Telegram handlers."""
+    def __init__(self, bot: FakeBot, user_id: int, text: str) -> None:
+        self.bot = bot
+        self.from_user = SimpleNamespace(id=user_id)
+        self.chat = SimpleNamespace(id=user_id)
+        self.text = text
+
+    async def answer(self, text: str, **kwargs: Any) -> FakeSentMessage:
+        await self.bot.call("sendMessage")
+        return FakeSentMessage(self.bot)
+
+
+class InstrumentedDispatcher(ConversationDispatcher):
+    """Records submit-to-reply latency per turn and lets the simulated user wait for its reply."""
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.turn_latencies: List[float] = []
+        self.turns: Dict[Hashable, asyncio.Future] = {}
+
+    def submit(self, key: Hashable, job: Job) -> bool:
+        done = asyncio.get_running_loop().create_future()
+        submitted = time.perf_counter()
+
+        async def timed() -> None:
+            try:
+                await job()
+            finally:
+                self.turn_latencies.append(time.perf_counter() - submitted)
+                done.set_result(True)
+
+        accepted = super().submit(key, timed)
+        if not accepted:
+            done.set_result(False)
+        self.turns[key] = done
+        return accepted
+
+
+def booking_script(user_id: int, service: str, day: str, time_str: str) -> List[Turn]:
+    """A typical conversation: browse the catalog, check slots, book and say thanks."""
+    user_name = f"Usuário {user_id}"
+    return [
+        ("Olá! Quais serviços vocês oferecem?", {"name": "list_services", "args": {}}),
+        (f"Quais horários vocês têm para {service}?", {"name": "get_available_slots", "args": {"service_name": service}}),
+        (f"Quero agendar {service} na {day} às {time_str}. Meu nome é {user_name}.",
+         {"name": "schedule_appointment", "args": {"user_name": user_name, "service_name": service, "day": day, "time": time_str}}),
+        ("Obrigado!", None),
+    ]
+
+
+def build_scripts(users: int, seed: int) -> List[List[Turn]]:
+    # Every user books a random catalog slot, so some bookings collide like in production
+    rng = random.Random(seed)
+    offers = [
+        (service.get_name(), entry["day"], slot.split("-")[0])
+        for service in get_services().get_all()
+        for professional in service.get_professionals()
+        for entry in professional.get("availability", [])
+        for slot in entry.get("slots", [])
+    ]
+    return [booking_script(user_id, *rng.choice(offers)) for user_id in range(1, users + 1)]
+
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.05) -> None:
+    # How late the loop wakes a sleeper is the time other callbacks held it
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+def rss_bytes() -> int:
+    # Current resident set size on Linux, peak RSS elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def store_bytes(path: str) -> int:
+    return sum(os.path.getsize(f"{path}{suffix}") for suffix in ("", "-wal", "-shm") if os.path.exists(f"{path}{suffix}"))
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    scripts = build_scripts(args.users, args.seed)
+    model = PlannedChatModel(plans={text: call for script in scripts for text, call in script}, latency=args.llm_latency_ms / 1000)
+    calendar = FakeCalendar(latency=args.calendar_latency_ms / 1000)
+    bot = FakeBot(latency=args.telegram_latency_ms / 1000)
+    rejected_turns = 0
+
+    with tempfile.TemporaryDirectory() as directory, \
+            patch("app.calendar._get_service", return_value=FakeCalendarService(calendar)), \
+            patch("app.graph.load_bound_chat_model", return_value=model):
+        store = os.path.join(directory, "checkpoints.sqlite")
+        hold_ledger.override(HoldLedger(os.path.join(directory, "holds.sqlite"), settings.HOLD_TTL, settings.CALENDAR_CACHE_TTL))
+        async with open_checkpointer(store) as checkpointer:
+            agent = build_graph(checkpointer)
+            conversations = InstrumentedDispatcher(
+                max_concurrency=args.max_concurrency,
+                max_queue_per_user=settings.TELEGRAM_MAX_QUEUE_PER_USER,
+                max_pending=settings.TELEGRAM_MAX_PENDING,
+            )
+
+            async def simulate_user(user_id: int, script: List[Turn]) -> None:
+                nonlocal rejected_turns
+                await asyncio.sleep(args.ramp_up * (user_id - 1) / args.users)
+                for text, _ in script:
+                    await handle_message(FakeMessage(bot, user_id, text), agent, conversations)
+                    if not await conversations.turns.pop(user_id):
+                        rejected_turns += 1
+                    await asyncio.sleep(random.uniform(0, 2 * args.think_time_ms / 1000))
+
+            lag_samples: List[float] = []
+            lag_monitor = asyncio.create_task(monitor_loop_lag(lag_samples))
+            rss_before, store_before = rss_bytes(), store_bytes(store)
+            started = time.perf_counter()
+            await asyncio.gather(*(simulate_user(user_id, script) for user_id, script in enumerate(scripts, start=1)))
+            await conversations.join()
+            elapsed = time.perf_counter() - started
+            lag_monitor.cancel()
+            rss_after, store_after = rss_bytes(), store_bytes(store)
+
+    latencies = conversations.turn_latencies
+    turns = len(latencies)
+    per_turn = max(turns, 1)
+    return {
+        "users": args.users,
+        "turns": turns,
+        "rejected_turns": rejected_turns,
+        "elapsed_seconds": round(elapsed, 2),
+        "throughput_turns_per_second": round(turns / elapsed, 2),
+        "turn_latency_ms": {f"p{int(p * 100)}": round(percentile(latencies, p) * 1000, 1) for p in (0.50, 0.95, 0.99)},
+        "queue_wait_p95_ms": round(conversations.stats()["wait_p95_seconds"] * 1000, 1),
+        "loop_lag_ms": {
+            "p50": round(percentile(lag_samples, 0.50) * 1000, 2),
+            "p99": round(percentile(lag_samples, 0.99) * 1000, 2),
+            "max": round(max(lag_samples, default=0.0) * 1000, 2),
+        },
+        "rss_growth_mb": round((rss_after - rss_before) / 2**20, 1),
+        "session_store_mb": round((store_after - store_before) / 2**20, 2),
+        "session_store_kb_per_user": round((store_after - store_before) / 1024 / args.users, 1),
+        "upstream_calls_per_turn": {
+            "llm": round(model.calls / per_turn, 2),
+            "calendar": round(calendar.total_calls / per_turn, 2),
+            "telegram": round(sum(bot.calls.values()) / per_turn, 2),
+        },
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="Simulated users, each running one booking conversation")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which users start")
+    parser.add_argument("--think-time-ms", type=float, default=500.0, help="Mean pause between a reply and the user's next message")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--calendar-latency-ms", type=float, default=50.0)
+    parser.add_argument("--telegram-latency-ms", type=float, default=30.0)
+    parser.add_argument("--max-concurrency", type=int, default=settings.TELEGRAM_MAX_CONCURRENCY, help="Turns processed at once by the dispatcher")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--log-level", default="ERROR", help="Log level during the run; per-turn logs distort the measurement")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(args.log_level)
+
+    report = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:<32} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
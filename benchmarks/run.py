@@ -0,0 +1,184 @@
+"""
+Standalone benchmark runner for the scheduling hot path.
+
+    PYTHONPATH=. python -m benchmarks.run --sizes small,medium --save-baseline
+    PYTHONPATH=. python -m benchmarks.run            # compares against benchmarks/baseline.json
+
+Reports median wall time, Calendar requests and peak traced allocations per operation,
+and exits with status 1 when a result regresses beyond the tolerance of the baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from typing import Callable, Dict, List
+from unittest.mock import patch
+
+import pendulum
+from langchain_core.messages import AIMessage
+
+from app.calendar import event_cache
+from app.holds import HoldLedger, hold_ledger
+from app.memo import tool_cache
+from app.services import Services
+from app.settings import settings
+from app.utils import DAY_MAP
+from benchmarks.catalog import write_catalog
+from benchmarks.fakes import FakeCalendar, FakeCalendarService, ScriptedChatModel
+
+# (services, professionals per service)
+SIZES = {"small": (3, 2), "medium": (300, 4), "large": (3000, 4)}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Modules whose cold import time is guarded; the bot imports app.graph on startup
+STARTUP_IMPORTS = ["app.services", "app.graph"]
+
+
+def reset_caches(calendar: FakeCalendar) -> None:
+    # Every iteration starts cold so calendar request counts are comparable
+    event_cache.clear()
+    tool_cache.clear()
+    calendar.events.clear()
+    calendar.reset_counts()
+    hold_ledger.override(HoldLedger(":memory:", settings.HOLD_TTL, settings.CALENDAR_CACHE_TTL))
+
+
+def build_scenarios(services: Services, model: ScriptedChatModel) -> Dict[str, Callable[[], object]]:
+    """Operations to measure against one catalog; each callable performs one operation."""
+    from app.graph import graph
+
+    all_services = services.get_all()
+    service = all_services[len(all_services) // 2]
+    professional = service.get_professionals()[0]
+    day = professional["availability"][0]["day"]
+    time_str = professional["availability"][0]["slots"][0].split("-")[0]
+    queries = [s.get_name().lower() for s in all_services[:: max(1, len(all_services) // 100)]]
+    model.responses = [
+        AIMessage(content="", tool_calls=[{"name": "get_available_slots", "args": {"service_name": service.get_name()}, "id": "bench"}]),
+        AIMessage(content="Estes são os horários disponíveis."),
+    ]
+    config = {"configurable": {"services": services}}
+    # Twenty weekly sessions on the same slot, as in a treatment plan
+    first_day = pendulum.now(settings.TIMEZONE).next(DAY_MAP[day.strip().lower()])
+    series = [
+        {"user_name": "Benchmark", "day": first_day.add(weeks=week).to_date_string(), "time": time_str}
+        for week in range(20)
+    ]
+
+    def graph_turn() -> None:
+        asyncio.run(graph.ainvoke({"messages": [{"role": "user", "content": f"horários de {service.get_name()}"}]}, config))
+
+    return {
+        "get_by_name_x100": lambda: [services.get_by_name(query) for query in queries],
+        "get_available_professionals": lambda: service.get_available_professionals(day, time_str),
+        "get_available_slots": service.get_available_slots,
+        "schedule": lambda: service.schedule("Benchmark", day, time_str),
+        "schedule_many_x20": lambda: service.schedule_many(series),
+        "find_earliest_slots_catalog": lambda: services.find_earliest_slots(limit=10),
+        "graph_turn": graph_turn,
+    }
+
+
+def measure(operation: Callable[[], object], calendar: FakeCalendar, iterations: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(iterations):
+        reset_caches(calendar)
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+    calendar_calls = calendar.total_calls
+
+    # Allocations are traced in a separate run so tracing does not skew the timings
+    reset_caches(calendar)
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_ms": round(statistics.median(timings) * 1000, 3),
+        "calendar_calls": calendar_calls,
+        "alloc_peak_kb": round(peak / 1024, 1),
+    }
+
+
+def measure_startup(module: str, iterations: int) -> Dict[str, float]:
+    """Median wall time of importing a module in a fresh interpreter."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root, "LOG_LEVEL": "WARNING"}
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=root, env=env, check=True)
+        timings.append(time.perf_counter() - started)
+    return {"wall_ms": round(statistics.median(timings) * 1000, 3), "calendar_calls": 0, "alloc_peak_kb": 0.0}
+
+
+def run(sizes: List[str], iterations: int, calendar_latency: float, llm_latency: float) -> Dict[str, Dict[str, float]]:
+    calendar = FakeCalendar(latency=calendar_latency)
+    model = ScriptedChatModel(responses=[AIMessage(content="")], latency=llm_latency)
+    results = {f"startup/import_{module.replace('.', '_')}": measure_startup(module, iterations) for module in STARTUP_IMPORTS}
+    with ExitStack() as stack:
+        stack.enter_context(patch("app.calendar._get_service", return_value=FakeCalendarService(calendar)))
+        stack.enter_context(patch("app.graph.load_bound_chat_model", return_value=model))
+        for size in sizes:
+            services_count, professionals = SIZES[size]
+            started = time.perf_counter()
+            services = Services(write_catalog(services_count, professionals))
+            results[f"{size}/load_catalog"] = {"wall_ms": round((time.perf_counter() - started) * 1000, 3), "calendar_calls": 0, "alloc_peak_kb": 0.0}
+            for name, operation in build_scenarios(services, model).items():
+                results[f"{size}/{name}"] = measure(operation, calendar, iterations)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Return a description of every result that is slower than tolerance x baseline or makes more calendar calls."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["wall_ms"] > previous["wall_ms"] * tolerance and result["wall_ms"] - previous["wall_ms"] > 1:
+            regressions.append(f"{name}: {result['wall_ms']} ms vs baseline {previous['wall_ms']} ms")
+        if result["calendar_calls"] > previous["calendar_calls"]:
+            regressions.append(f"{name}: {result['calendar_calls']} calendar calls vs baseline {previous['calendar_calls']}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma separated catalog sizes: {', '.join(SIZES)}")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--calendar-latency-ms", type=float, default=5.0, help="Latency injected into every fake Calendar request")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Latency injected into every fake model call")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="Allowed slowdown factor before a result counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes.split(","), args.iterations, args.calendar_latency_ms / 1000, args.llm_latency_ms / 1000)
+    print(f"{'benchmark':<40} {'wall ms':>10} {'calendar':>9} {'peak KB':>10}")
+    for name, result in results.items():
+        print(f"{name:<40} {result['wall_ms']:>10.3f} {result['calendar_calls']:>9} {result['alloc_peak_kb']:>10.1f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""pytest-benchmark entry points for the same scenarios as benchmarks.run (skipped when the plugin is missing)."""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from app.services import Services
+from benchmarks.catalog import write_catalog
+from benchmarks.fakes import FakeCalendar, FakeCalendarService, ScriptedChatModel
+from benchmarks.run import build_scenarios, reset_caches
+
+SCENARIOS = ["get_by_name_x100", "get_available_professionals", "get_available_slots", "schedule", "schedule_many_x20", "find_earliest_slots_catalog", "graph_turn"]
+
+
+@pytest.fixture(scope="module")
+def calendar():
+    backend = FakeCalendar(latency=0.005)
+    with patch("app.calendar._get_service", return_value=FakeCalendarService(backend)):
+        yield backend
+
+
+@pytest.fixture(scope="module")
+def scenarios(calendar):
+    model = ScriptedChatModel(responses=[AIMessage(content="")])
+    with patch("app.graph.load_bound_chat_model", return_value=model):
+        yield build_scenarios(Services(write_catalog(300, 4)), model)
+
+
+@pytest.mark.parametrize("name", SCENARIOS)
+def test_scenario(benchmark, calendar, scenarios, name):
+    benchmark.pedantic(scenarios[name], setup=lambda: reset_caches(calendar), rounds=5)
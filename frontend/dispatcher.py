@@ -0,0 +1,95 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Tuple
+
+from app.settings import settings
+from app.telemetry import DISPATCHER_BACKLOG, DISPATCHER_MESSAGES, DISPATCHER_QUEUE_WAIT
+import logging
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class ConversationDispatcher:
+    """
+    Runs different users' conversations in parallel while keeping each user's messages strictly ordered.
+    Every user gets a FIFO queue drained by a single worker task; a global semaphore caps how many
+    turns run at once and submissions beyond the queue limits are rejected so the caller can reply "busy".
+    """
+    def __init__(self, max_concurrency: int, max_queue_per_user: int, max_pending: int) -> None:
+        self.max_queue_per_user = max_queue_per_user
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queues: Dict[Hashable, Deque[Tuple[float, Job]]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self.pending = 0
+        self.running = 0
+        self.processed = 0
+        self.rejected = 0
+        # Recent queue wait times in seconds, used for percentiles
+        self.wait_times: Deque[float] = deque(maxlen=1000)
+
+    def submit(self, key: Hashable, job: Job) -> bool:
+        """Queue job behind the user's earlier messages. Returns False when the dispatcher is saturated."""
+        queue = self._queues.setdefault(key, deque())
+        DISPATCHER_BACKLOG.observe(self.pending)
+        if self.pending >= self.max_pending or len(queue) >= self.max_queue_per_user:
+            self.rejected += 1
+            DISPATCHER_MESSAGES.inc(result="rejected")
+            logger.warning(f"Rejected message for {key}: {len(queue)} queued for user, {self.pending} pending overall")
+            if not queue:
+                del self._queues[key]
+            return False
+        queue.append((time.monotonic(), job))
+        self.pending += 1
+        DISPATCHER_MESSAGES.inc(result="queued")
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._drain(key))
+        return True
+
+    async def _drain(self, key: Hashable) -> None:
+        queue = self._queues[key]
+        while queue:
+            enqueued_at, job = queue.popleft()
+            async with self._semaphore:
+                wait = time.monotonic() - enqueued_at
+                self.wait_times.append(wait)
+                DISPATCHER_QUEUE_WAIT.observe(wait)
+                logger.debug(f"Message for {key} waited {wait * 1000:.0f} ms in queue")
+                self.running += 1
+                try:
+                    await job()
+                except Exception:
+                    logger.exception(f"Error while handling message for {key}")
+                finally:
+                    self.running -= 1
+                    self.pending -= 1
+                    self.processed += 1
+        # No await since the last check, so no message can have been queued in between
+        del self._queues[key]
+        del self._workers[key]
+
+    async def join(self) -> None:
+        """Wait until every queued message has been handled."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()))
+
+    def stats(self) -> Dict[str, float]:
+        waits = sorted(self.wait_times)
+
+        def percentile(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        return {
+            "active_users": len(self._queues),
+            "pending": self.pending,
+            "running": self.running,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "wait_p50_seconds": percentile(0.50),
+            "wait_p95_seconds": percentile(0.95),
+            "wait_max_seconds": waits[-1] if waits else 0.0,
+        }
@@ -1,13 +1,44 @@
 import json
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph.state import CompiledStateGraph
+
 from app.settings import settings
+import logging
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def open_checkpointer(path: str = settings.CHECKPOINT_DB) -> AsyncIterator[AsyncSqliteSaver]:
+    """Open the SQLite checkpointer that stores every conversation, keyed by thread_id."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(path) as checkpointer:
+        yield checkpointer
+
+
+def session_config(session_id) -> RunnableConfig:
+    # Each user (or browser session) is its own LangGraph thread
+    return {"configurable": {"thread_id": str(session_id)}}
 
-def load_sessions():
-    if os.path.exists(settings.SESSIONS_FILE):
-        with open(settings.SESSIONS_FILE, "r") as f:
-            return json.load(f)
-    return {}
 
-def save_sessions(sessions):
-    with open(settings.SESSIONS_FILE, "w") as f:
-        json.dump(sessions, f, indent=2)
+async def import_legacy_sessions(agent: CompiledStateGraph, path: str = settings.SESSIONS_FILE) -> None:
+    """One-off import of the old sessions.json into the checkpointer; the file is renamed afterwards."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        sessions = json.load(f)
+    imported = 0
+    for session_id, session in sessions.items():
+        config = session_config(session_id)
+        if (await agent.aget_state(config)).values:
+            continue
+        await agent.aupdate_state(config, {"messages": session.get("messages", [])}, as_node="call_model")
+        imported += 1
+    os.replace(path, f"{path}.imported")
+    logger.info(f"Imported {imported} legacy sessions from {path}")
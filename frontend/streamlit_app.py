@@ -4,32 +4,54 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
 import asyncio
-from app.graph import graph
-from app.utils import convert_history_to_messages
+from uuid import uuid4
+from app.graph import build_graph, warm_up
+from app.streaming import stream_reply
+from app.telemetry import start_metrics_server
+from frontend.sessions import open_checkpointer, session_config
 
 st.set_page_config(page_title="Nexia - Assistente de Agendamentos", page_icon="🤖")
+# Cached after the first script run, so reruns reuse the same client
+warm_up()
+start_metrics_server()
 st.title("🤖 Nexia - Assistente de Agendamentos")
 
 if "history" not in st.session_state:
     st.session_state.history = []
 
-if "state" not in st.session_state:
-    st.session_state.state = {"messages": []}
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = str(uuid4())
+
+
+async def ask(text: str, placeholder) -> str:
+    # Each script run has its own event loop, so the checkpointer is opened per message
+    async with open_checkpointer() as checkpointer:
+        agent = build_graph(checkpointer)
+        answer = ""
+        async for update in stream_reply(agent, {"messages": [{"role": "user", "content": text}]}, session_config(st.session_state.thread_id)):
+            if update.kind == "status":
+                answer = ""
+                placeholder.caption(update.text)
+            elif update.kind == "token":
+                answer += update.text
+                placeholder.markdown(answer + "▌")
+            else:
+                return update.text
+
 
 user_input = st.chat_input("Digite sua mensagem:")
 
 if user_input:
     st.session_state.history.append(("Usuário", user_input))
-    st.session_state.state["messages"] = convert_history_to_messages(st.session_state.history)
 
-    with st.spinner("Nexia está pensando..."):
-        result = asyncio.run(graph.ainvoke(st.session_state.state))
-        messages = result.pop("messages", [])
-        response = messages[-1].content if messages else "Desculpe, não entendi sua solicitação."
+    with st.chat_message("assistant", avatar="🤖"):
+        placeholder = st.empty()
+        placeholder.caption("Nexia está pensando...")
+        response = asyncio.run(ask(user_input, placeholder))
+        # The full history, including this reply, is rendered below
+        placeholder.empty()
 
     st.session_state.history.append(("Nexia", response))
-    st.session_state.state.update(result)
-    st.session_state.state["messages"] = convert_history_to_messages(st.session_state.history)
 
 st.markdown("---")
 for speaker, text in st.session_state.history:
@@ -1,18 +1,29 @@
 import logging
+import time
+from typing import Optional
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
-from aiogram.enums import ParseMode
+from aiogram.enums import ChatAction, ParseMode
+from aiogram.exceptions import TelegramBadRequest
 import asyncio
 from aiogram.client.default import DefaultBotProperties
+from langgraph.graph.state import CompiledStateGraph
 
-from app.graph import graph
+from app.graph import build_graph, warm_up
 from app.settings import settings
-from frontend.sessions import load_sessions, save_sessions
+from app.streaming import stream_reply
+from app.telemetry import start_metrics_server
+from frontend.dispatcher import ConversationDispatcher
+from frontend.sessions import import_legacy_sessions, open_checkpointer, session_config
 
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-sessions = load_sessions()
+# Telegram messages are limited to 4096 characters
+MAX_MESSAGE_LENGTH = 4096
+# Telegram shows a chat action for about 5 seconds
+TYPING_INTERVAL = 4.0
+BUSY_REPLY = "Estou recebendo muitas mensagens agora. Por favor, aguarde um momento e tente novamente."
 
 bot = Bot(
     token=settings.TELEGRAM_BOT_TOKEN,
@@ -20,34 +31,103 @@ bot = Bot(
 )
 dp = Dispatcher()
 
+
+class ProgressiveReply:
+    """
+    Shows a reply while it is generated by editing one Telegram message.
+    Edits are throttled to TELEGRAM_EDIT_INTERVAL to stay within Bot API limits.
+    """
+    def __init__(self, message: types.Message) -> None:
+        self.message = message
+        self.sent: Optional[types.Message] = None
+        self.shown = ""
+        self.last_edit = 0.0
+
+    async def update(self, text: str, force: bool = False) -> None:
+        # Partial text is sent without parse mode, since it may contain unbalanced HTML
+        text = text[:MAX_MESSAGE_LENGTH]
+        if not text.strip() or text == self.shown:
+            return
+        if not force and time.monotonic() - self.last_edit < settings.TELEGRAM_EDIT_INTERVAL:
+            return
+        if self.sent is None:
+            self.sent = await self.message.answer(text, parse_mode=None)
+        else:
+            await self._edit(text, parse_mode=None)
+        self.shown = text
+        self.last_edit = time.monotonic()
+
+    async def finish(self, text: str) -> None:
+        if self.sent is None:
+            await self.message.answer(text)
+        else:
+            await self._edit(text)
+
+    async def _edit(self, text: str, **kwargs) -> None:
+        try:
+            await self.sent.edit_text(text, **kwargs)
+        except TelegramBadRequest as e:
+            # "message is not modified" and similar races are harmless
+            logger.debug(f"Skipped message edit: {e}")
+
+
+async def keep_typing(message: types.Message) -> None:
+    # Repeat the typing indicator until the reply is complete
+    while True:
+        await message.bot.send_chat_action(chat_id=message.chat.id, action=ChatAction.TYPING)
+        await asyncio.sleep(TYPING_INTERVAL)
+
+
 @dp.message(Command("start"))
 async def handle_start(message: types.Message):
     await message.answer("Olá! Sou seu assistente virtual. Como posso ajudar?")
 
 @dp.message()
-async def handle_message(message: types.Message):
+async def handle_message(message: types.Message, agent: CompiledStateGraph, conversations: ConversationDispatcher):
+    # Replies run in the user's queue, so this handler returns right away
+    if not conversations.submit(message.from_user.id, lambda: reply_to(message, agent)):
+        await message.answer(BUSY_REPLY)
+
+async def reply_to(message: types.Message, agent: CompiledStateGraph):
     user_id = message.from_user.id
     text = message.text
 
     logger.info(f"[Entrada] Usuario {user_id}: {text}")
 
-    if user_id not in sessions:
-        sessions[user_id] = {"messages": []}
-
-    sessions[user_id]["messages"].append({"role": "user", "content": text})
-
-    result = await graph.ainvoke(sessions[user_id])
-    messages = result.pop("messages", [])
-
-    response = messages[-1].content if messages else "Desculpe, não entendi sua solicitação."
-    sessions[user_id]["messages"].append({"role": "assistant", "content": response})
-    save_sessions(sessions)
+    typing = asyncio.create_task(keep_typing(message))
+    reply = ProgressiveReply(message)
+    answer = ""
+    response = None
+    try:
+        # History lives in the checkpointer; only the new message is sent
+        async for update in stream_reply(agent, {"messages": [{"role": "user", "content": text}]}, session_config(user_id)):
+            if update.kind == "status":
+                answer = ""
+                await reply.update(update.text, force=reply.sent is None)
+            elif update.kind == "token":
+                answer += update.text
+                await reply.update(answer)
+            else:
+                response = update.text
+    finally:
+        typing.cancel()
 
     logger.info(f"[Salida] Usuario {user_id}: {response}")
-    await message.answer(response)
+    await reply.finish(response)
 
 async def main():
-    await dp.start_polling(bot)
+    warm_up()
+    start_metrics_server()
+    async with open_checkpointer() as checkpointer:
+        agent = build_graph(checkpointer)
+        await import_legacy_sessions(agent)
+        conversations = ConversationDispatcher(
+            max_concurrency=settings.TELEGRAM_MAX_CONCURRENCY,
+            max_queue_per_user=settings.TELEGRAM_MAX_QUEUE_PER_USER,
+            max_pending=settings.TELEGRAM_MAX_PENDING,
+        )
+        # `agent` and `conversations` are injected into handlers as workflow data
+        await dp.start_polling(bot, agent=agent, conversations=conversations)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
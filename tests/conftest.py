@@ -0,0 +1,13 @@
+import pytest
+
+from app.holds import HoldLedger, hold_ledger
+
+
+@pytest.fixture(autouse=True)
+def isolated_hold_ledger(tmp_path):
+    # Every test books against its own empty ledger instead of data/holds.sqlite
+    ledger = HoldLedger(str(tmp_path / "holds.sqlite"), ttl_seconds=300, committed_ttl_seconds=60)
+    hold_ledger.override(ledger)
+    yield ledger
+    hold_ledger.reset()
+    ledger.close()
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.availability import AvailabilityIndex, events_to_intervals
+
+TZ = ZoneInfo("America/Sao_Paulo")
+WINDOW_START = datetime(2025, 7, 14, tzinfo=TZ)
+WINDOW_END = WINDOW_START + timedelta(days=7)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    return datetime(2025, 7, day, hour, minute, tzinfo=TZ)
+
+
+def test_events_to_intervals_skips_cancelled():
+    events = [
+        {"start": {"dateTime": "2025-07-16T10:00:00-03:00"}, "end": {"dateTime": "2025-07-16T11:00:00-03:00"}},
+        {"status": "cancelled", "start": {"dateTime": "2025-07-16T12:00:00-03:00"}, "end": {"dateTime": "2025-07-16T13:00:00-03:00"}},
+    ]
+    intervals = events_to_intervals(events)
+    assert len(intervals) == 1
+    assert intervals[0][0] == at(16, 10)
+
+
+def test_availability_index_overlap_checks():
+    index = AvailabilityIndex(WINDOW_START, WINDOW_END, [(at(16, 10), at(16, 11)), (at(16, 10, 30), at(16, 12))])
+    assert len(index) == 1
+    assert not index.is_free(at(16, 11), at(16, 12))
+    assert index.is_free(at(16, 9), at(16, 10))
+    assert index.is_free(at(16, 12), at(16, 13))
+
+
+def test_availability_index_add_busy():
+    index = AvailabilityIndex(WINDOW_START, WINDOW_END)
+    assert index.is_free(at(17, 9), at(17, 10))
+    index.add_busy(at(17, 9), at(17, 10))
+    assert not index.is_free(at(17, 9, 30), at(17, 10, 30))
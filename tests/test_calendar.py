@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.calendar import CalendarError, EventWindowCache, calendar_breaker, is_slot_available, calendar_deadline, create_event, create_events, event_cache, get_events, run_in_calendar_pool
+
+TZ = ZoneInfo("America/Sao_Paulo")
+WINDOW_START = datetime(2025, 7, 14, tzinfo=TZ)
+WINDOW_END = WINDOW_START + timedelta(days=7)
+
+
+def make_event(event_id: str, start: str, end: str) -> dict:
+    return {"id": event_id, "start": {"dateTime": start}, "end": {"dateTime": end}}
+
+
+def test_event_cache_hit_and_covering_window():
+    cache = EventWindowCache(ttl_seconds=60, max_windows=4)
+    assert cache.get(WINDOW_START, WINDOW_END) is None
+    cache.put(WINDOW_START, WINDOW_END, [make_event("a", "2025-07-16T10:00:00-03:00", "2025-07-16T11:00:00-03:00")])
+    assert len(cache.get(WINDOW_START, WINDOW_END)) == 1
+    # A narrower window is served from the cached one
+    narrow = cache.get(datetime(2025, 7, 17, 10, tzinfo=TZ), datetime(2025, 7, 17, 11, tzinfo=TZ))
+    assert narrow == []
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_event_cache_expires_and_evicts():
+    cache = EventWindowCache(ttl_seconds=0, max_windows=1)
+    cache.put(WINDOW_START, WINDOW_END, [])
+    assert cache.get(WINDOW_START, WINDOW_END) is None
+    cache.put(WINDOW_END, WINDOW_END + timedelta(days=7), [])
+    assert cache.stats()["evictions"] == 1
+
+
+def test_event_cache_patched_on_write_and_sync():
+    cache = EventWindowCache(ttl_seconds=60, max_windows=4)
+    cache.put(WINDOW_START, WINDOW_END, [make_event("a", "2025-07-16T10:00:00-03:00", "2025-07-16T11:00:00-03:00")], "t1")
+    cache.add_event(make_event("b", "2025-07-17T10:00:00-03:00", "2025-07-17T11:00:00-03:00"))
+    assert {e["id"] for e in cache.get(WINDOW_START, WINDOW_END)} == {"a", "b"}
+
+    cache.apply_changes([{"id": "a", "status": "cancelled"}], "t1", "t2")
+    assert {e["id"] for e in cache.get(WINDOW_START, WINDOW_END)} == {"b"}
+    assert cache.stats()["incremental_refreshes"] == 1
+
+
+class FakeEventList:
+    """Calendar whose sync tokens are version numbers, so a sync returns every change made since the token."""
+    def __init__(self):
+        self.changes = []
+
+    def add(self, event):
+        self.changes.append(event)
+
+    def __call__(self, syncToken=None, timeMin=None, timeMax=None):
+        if syncToken is not None:
+            return self.changes[int(syncToken):], str(len(self.changes))
+        start, end = datetime.fromisoformat(timeMin), datetime.fromisoformat(timeMax)
+        events = [event for event in self.changes if datetime.fromisoformat(event["start"]["dateTime"]) < end
+                  and datetime.fromisoformat(event["end"]["dateTime"]) > start]
+        return events, str(len(self.changes))
+
+
+def test_incremental_sync_only_refreshes_windows_of_the_same_token():
+    calendar = FakeEventList()
+    cache = EventWindowCache(ttl_seconds=60, max_windows=4)
+    next_week = (WINDOW_END, WINDOW_END + timedelta(days=7))
+    with patch("app.calendar._list_events", side_effect=calendar), patch("app.calendar.event_cache", cache), \
+            patch("app.calendar.settings.CALENDAR_INCREMENTAL_SYNC", True):
+        assert get_events(WINDOW_START, WINDOW_END) == []
+        # Another client books inside the first window, then the second window is fetched in full
+        calendar.add(make_event("x", "2025-07-16T10:00:00-03:00", "2025-07-16T11:00:00-03:00"))
+        assert get_events(*next_week) == []
+        for entry in cache._windows.values():
+            entry[3] = float("-inf")
+        assert [event["id"] for event in get_events(WINDOW_START, WINDOW_END)] == ["x"]
+    assert cache.stats()["incremental_refreshes"] == 1
+
+
+def test_calendar_pool_runs_calls_concurrently_off_the_event_loop():
+    main_thread = threading.get_ident()
+    seen_threads = set()
+
+    def fake_get_events(start, end):
+        seen_threads.add(threading.get_ident())
+        return [] if start.hour != 10 else [make_event("a", start.isoformat(), end.isoformat())]
+
+    async def check(slots):
+        return await asyncio.gather(*(run_in_calendar_pool(is_slot_available, start, end) for start, end in slots))
+
+    slots = [(WINDOW_START.replace(hour=h), WINDOW_START.replace(hour=h + 1)) for h in (9, 10, 11)]
+    with patch("app.calendar.get_events", side_effect=fake_get_events):
+        result = asyncio.run(check(slots))
+    assert result == [True, False, True]
+    assert main_thread not in seen_threads
+
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, body, request_id):
+        self.requests.append((request_id, body))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        for request_id, body in self.requests:
+            if body["summary"].startswith("Fail"):
+                self.callback(request_id, None, RuntimeError("rate limited"))
+            else:
+                self.callback(request_id, {**body, "id": f"evt-{request_id}"}, None)
+
+
+class FakeService:
+    def __init__(self):
+        self.batches = []
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        return body
+
+
+def test_create_events_batches_and_reports_partial_failures():
+    service = FakeService()
+    appointments = [
+        {"user_name": "Fail" if i == 3 else f"User {i}", "service_name": "Fisioterapia", "professional_name": "Ana Souza",
+         "start_time": WINDOW_START.replace(hour=8) + timedelta(hours=i), "duration_minutes": 60}
+        for i in range(5)
+    ]
+    with patch("app.calendar._get_service", return_value=service), patch("app.calendar.settings.CALENDAR_BATCH_SIZE", 2):
+        results = create_events(appointments)
+
+    assert service.batches == [2, 2, 1]
+    assert results[0] == ("evt-0", None)
+    assert results[3] == (None, "rate limited")
+    assert [event_id for event_id, _ in results] == ["evt-0", "evt-1", "evt-2", None, "evt-4"]
+
+
+def _http_error(status: int):
+    import httplib2
+    from googleapiclient.errors import HttpError
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class FlakyInsert:
+    """Fails the first insert with a 503 after applying it, then answers 409 like Google does for a known id."""
+    def __init__(self):
+        self.bodies = []
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body):
+        self.bodies.append(body)
+        return self
+
+    def execute(self):
+        raise _http_error(503 if len(self.bodies) == 1 else 409)
+
+
+def test_create_event_retry_is_idempotent():
+    service = FlakyInsert()
+    with patch("app.calendar._get_service", return_value=service), patch("app.calendar.settings.RETRY_BASE_DELAY", 0), \
+            patch("app.resilience.time.sleep") as sleep:
+        event_id = create_event("Juan", "Fisioterapia", "Ana Souza", WINDOW_START.replace(hour=9), 60)
+    # The patched base delay is honoured: the retry does not back off
+    sleep.assert_called_once_with(0)
+
+    assert len(service.bodies) == 2
+    assert event_id == service.bodies[0]["id"] == service.bodies[1]["id"]
+
+
+def test_get_events_reports_outages_instead_of_free_slots():
+    event_cache.clear()
+    calendar_breaker.reset()
+    with patch("app.calendar._get_service", side_effect=ConnectionError("unreachable")), \
+            patch("app.resilience.time.sleep"), pytest.raises(CalendarError):
+        get_events(WINDOW_START, WINDOW_END)
+    calendar_breaker.reset()
+
+
+def test_local_errors_are_not_retried():
+    event_cache.clear()
+    calendar_breaker.reset()
+    with patch("app.calendar._get_service", side_effect=FileNotFoundError("credentials.json")) as get_service, \
+            patch("app.resilience.time.sleep") as sleep, pytest.raises(CalendarError):
+        get_events(WINDOW_START, WINDOW_END)
+    assert get_service.call_count == 1
+    sleep.assert_not_called()
+    assert calendar_breaker.state == "closed"
+
+
+def test_calendar_pool_deadline_covers_retries():
+    with patch("app.calendar.settings.CALENDAR_TIMEOUT", 10), patch("app.calendar.settings.CALENDAR_MAX_ATTEMPTS", 3), \
+            patch("app.calendar.settings.RETRY_BASE_DELAY", 0.2), patch("app.calendar.settings.RETRY_MAX_DELAY", 5), \
+            patch("app.calendar.settings.CALENDAR_HEDGE_DELAY", 0):
+        assert calendar_deadline() == pytest.approx(30.6)
+
+    async def run():
+        # Reads past their deadline fail explicitly; writes are awaited to completion
+        with pytest.raises(CalendarError):
+            await run_in_calendar_pool(time.sleep, 0.2, timeout=0.01)
+        return await run_in_calendar_pool(lambda: time.sleep(0.05) or "evt1", write=True)
+
+    assert asyncio.run(run()) == "evt1"
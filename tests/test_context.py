@@ -0,0 +1,25 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.context import count_tokens, find_fold_point
+
+
+def make_turn(text: str) -> list:
+    return [
+        HumanMessage(content=text),
+        AIMessage(content="", tool_calls=[{"name": "list_services", "args": {}, "id": text}]),
+        ToolMessage(content="Fisioterapia, Acupuntura, Rolfing", tool_call_id=text),
+        AIMessage(content=f"Resposta para {text}"),
+    ]
+
+
+def test_find_fold_point_cuts_on_user_turns():
+    messages = make_turn("primeira pergunta") + make_turn("segunda pergunta") + make_turn("terceira pergunta")
+    keep_tokens = count_tokens(messages[4:])
+    assert find_fold_point(messages, keep_tokens) == 4
+    assert find_fold_point(messages, count_tokens(messages)) == 0
+
+
+def test_find_fold_point_keeps_latest_user_message():
+    messages = make_turn("primeira pergunta") + [HumanMessage(content="x" * 1000)]
+    assert find_fold_point(messages, 10) == 4
+    assert find_fold_point([AIMessage(content="olá")], 10) == 0
@@ -0,0 +1,75 @@
+import asyncio
+
+from app import telemetry
+from frontend.dispatcher import ConversationDispatcher
+
+
+def test_dispatcher_orders_per_user_and_runs_users_in_parallel():
+    async def run():
+        dispatcher = ConversationDispatcher(max_concurrency=4, max_queue_per_user=10, max_pending=100)
+        log = []
+        running = 0
+        peak = 0
+
+        def job(user, n):
+            async def handle():
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                log.append((user, n))
+                running -= 1
+            return handle
+
+        for n in range(3):
+            for user in ("a", "b"):
+                assert dispatcher.submit(user, job(user, n))
+        await dispatcher.join()
+        return dispatcher, log, peak
+
+    dispatcher, log, peak = asyncio.run(run())
+    assert [n for user, n in log if user == "a"] == [0, 1, 2]
+    assert [n for user, n in log if user == "b"] == [0, 1, 2]
+    assert peak == 2
+    assert dispatcher.stats()["processed"] == 6
+    assert dispatcher.stats()["active_users"] == 0
+
+
+def test_dispatcher_rejects_when_queue_is_full():
+    async def run():
+        dispatcher = ConversationDispatcher(max_concurrency=1, max_queue_per_user=1, max_pending=2)
+
+        async def handle():
+            await asyncio.sleep(0.01)
+
+        results = [dispatcher.submit("a", handle), dispatcher.submit("a", handle), dispatcher.submit("b", handle), dispatcher.submit("c", handle)]
+        await dispatcher.join()
+        return dispatcher, results
+
+    dispatcher, results = asyncio.run(run())
+    assert results == [True, False, True, False]
+    assert dispatcher.stats()["rejected"] == 2
+
+
+def test_dispatcher_exports_queue_metrics():
+    async def run():
+        dispatcher = ConversationDispatcher(max_concurrency=1, max_queue_per_user=1, max_pending=2)
+
+        async def handle():
+            await asyncio.sleep(0.01)
+
+        for user in ("a", "a", "b", "c"):
+            dispatcher.submit(user, handle)
+        await dispatcher.join()
+
+    telemetry.configure(True)
+    telemetry.registry.clear()
+    try:
+        asyncio.run(run())
+        assert telemetry.DISPATCHER_MESSAGES.value(result="queued") == 2
+        assert telemetry.DISPATCHER_MESSAGES.value(result="rejected") == 2
+        assert telemetry.DISPATCHER_BACKLOG.count() == 4
+        assert telemetry.DISPATCHER_QUEUE_WAIT.count() == 2
+        assert "nexia_dispatcher_queue_wait_seconds_count 2" in telemetry.render_prometheus()
+    finally:
+        telemetry.configure(False)
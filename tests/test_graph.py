@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+from zoneinfo import ZoneInfo
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from app.configuration import Configuration
+from app.calendar import CalendarError
+from app.graph import MODEL_UNAVAILABLE_REPLY, _llm_breakers, assemble_prompt, call_model, choose_model, fast_path, manage_context, quantize_time
+from app.resilience import CircuitOpenError
+from app.services import Services
+from app.settings import settings
+from app.state import State
+
+CONFIG_FILE = Path(__file__).parent / "mock_services.yaml"
+TZ = ZoneInfo("America/Sao_Paulo")
+
+
+def test_quantize_time():
+    assert quantize_time(datetime(2025, 7, 14, 14, 7, 31, 123456, tzinfo=TZ), 15) == "2025-07-14T14:00-03:00"
+    assert quantize_time(datetime(2025, 7, 14, 14, 59, tzinfo=TZ), 15) == "2025-07-14T14:45-03:00"
+
+
+def test_assemble_prompt_keeps_a_stable_prefix():
+    configuration = Configuration(services=Services(config_path=str(CONFIG_FILE)))
+    first = State(messages=[HumanMessage(content="Oi", id="1")])
+    later = State(messages=[HumanMessage(content="Oi", id="1"), AIMessage(content="Olá!", id="2"), HumanMessage(content="Horários?", id="3")])
+
+    step_one = assemble_prompt(configuration, first, datetime(2025, 7, 14, 14, 1, tzinfo=TZ))
+    step_two = assemble_prompt(configuration, later, datetime(2025, 7, 14, 16, 40, tzinfo=TZ))
+
+    # System prompt and catalog are identical objects across steps and turns, the time comes last
+    assert step_one[:2] == step_two[:2]
+    assert step_one[0] is step_two[0]
+    assert "Fisioterapia, Acupuntura, Rolfing" in step_one[1]["content"]
+    assert step_one[2:-1] == first.messages
+    assert step_two[2:-1] == later.messages
+    assert step_two[-1] == {"role": "system", "content": "System time: 2025-07-14T16:30-03:00"}
+
+
+def test_choose_model_routes_routine_steps_to_the_fast_model():
+    configuration = Configuration(services=Services(config_path=str(CONFIG_FILE)), fast_model="openai/gpt-4o-mini")
+    question = HumanMessage(content="Quais horários de fisioterapia?", id="1")
+    call = AIMessage(content="", id="2", tool_calls=[{"name": "get_available_slots", "args": {"service_name": "Fisioterapia"}, "id": "c1"}])
+
+    assert choose_model(configuration, State(messages=[question])) == ("fast", "tool_selection")
+    ok = ToolMessage(content='[{"professional": "Ana Souza"}]', tool_call_id="c1", id="3")
+    assert choose_model(configuration, State(messages=[question, call, ok])) == ("fast", "tool_result")
+    failed = ToolMessage(content='{"status": "error", "message": "Serviço não encontrado."}', tool_call_id="c1", id="3")
+    assert choose_model(configuration, State(messages=[question, call, failed])) == ("primary", "tool_error")
+    rambling = HumanMessage(content=" ".join(["talvez"] * 40), id="1")
+    assert choose_model(configuration, State(messages=[rambling])) == ("primary", "ambiguous")
+    long_history = [HumanMessage(content="Oi " * 3000, id="1"), AIMessage(content="Olá!", id="2"), HumanMessage(content="Horários?", id="3")]
+    assert choose_model(configuration, State(messages=long_history)) == ("primary", "long_context")
+    assert choose_model(Configuration(services=configuration.services), State(messages=[question])) == ("primary", "disabled")
+
+
+def test_call_model_escalates_unusable_fast_answers():
+    configuration = Configuration(services=Services(config_path=str(CONFIG_FILE)), model="openai/gpt-4o", fast_model="openai/gpt-4o-mini")
+    replies = {
+        "openai/gpt-4o-mini": AIMessage(content="", tool_calls=[{"name": "book_everything", "args": {}, "id": "c1"}]),
+        "openai/gpt-4o": AIMessage(content="Temos horários na segunda-feira."),
+    }
+    models = {name: MagicMock(ainvoke=AsyncMock(return_value=reply)) for name, reply in replies.items()}
+
+    with patch("app.graph.Configuration.from_context", return_value=configuration), \
+            patch("app.graph.load_bound_chat_model", side_effect=lambda name, key, tools: models[name]):
+        result = asyncio.run(call_model(State(messages=[HumanMessage(content="Horários?", id="1")])))
+
+    assert result["messages"][0].content == "Temos horários na segunda-feira."
+    models["openai/gpt-4o-mini"].ainvoke.assert_awaited_once()
+    models["openai/gpt-4o"].ainvoke.assert_awaited_once()
+
+
+def test_call_model_apologizes_when_the_model_is_unavailable():
+    configuration = Configuration(services=Services(config_path=str(CONFIG_FILE)))
+    model = MagicMock(ainvoke=AsyncMock(side_effect=TimeoutError("read timed out")))
+
+    with patch("app.graph.Configuration.from_context", return_value=configuration), \
+            patch("app.graph.load_bound_chat_model", return_value=model), \
+            patch("app.resilience.asyncio.sleep", new=AsyncMock()):
+        result = asyncio.run(call_model(State(messages=[HumanMessage(content="Oi", id="1")])))
+
+    assert result["messages"][0].content == MODEL_UNAVAILABLE_REPLY
+    assert model.ainvoke.await_count == settings.LLM_MAX_ATTEMPTS
+    _llm_breakers.clear()
+
+
+def test_manage_context_skips_the_summary_when_the_model_is_unavailable():
+    configuration = Configuration(services=Services(config_path=str(CONFIG_FILE)), max_context_tokens=20)
+    model = MagicMock(ainvoke=AsyncMock(side_effect=TimeoutError("read timed out")))
+    messages = []
+    for n in range(6):
+        messages += [HumanMessage(content=f"Quero agendar fisioterapia na segunda-feira, pedido {n}", id=f"h{n}"),
+                     AIMessage(content="Claro, temos horários às 09:00 e às 10:00.", id=f"a{n}")]
+
+    with patch("app.graph.Configuration.from_context", return_value=configuration), \
+            patch("app.graph.load_bound_chat_model", return_value=model), \
+            patch("app.resilience.asyncio.sleep", new=AsyncMock()):
+        # The turn goes on to call_model, which answers the user even when the model stays down
+        assert asyncio.run(manage_context(State(messages=messages))) == {}
+
+    assert model.ainvoke.await_count == settings.LLM_MAX_ATTEMPTS
+    _llm_breakers.clear()
+
+
+def test_fast_path_defers_to_the_model_when_the_calendar_fails():
+    configuration = Configuration(services=Services(config_path=str(CONFIG_FILE)), enable_fast_path=True)
+    state = State(messages=[HumanMessage(content="Quais horários de fisioterapia?", id="1")])
+    for error in (asyncio.TimeoutError(), CircuitOpenError("calendar", 30), CalendarError("down")):
+        with patch("app.graph.Configuration.from_context", return_value=configuration), \
+                patch("app.graph.get_available_slots", new=AsyncMock(side_effect=error)):
+            assert asyncio.run(fast_path(state)) == {"attempts": 0}
@@ -0,0 +1,54 @@
+import threading
+from unittest.mock import patch
+
+import pendulum
+
+from app.holds import HoldLedger
+
+START = pendulum.datetime(2030, 1, 7, 10, 0, tz="America/Sao_Paulo")
+
+
+def test_only_one_concurrent_acquire_wins(tmp_path):
+    path = str(tmp_path / "holds.sqlite")
+    # Separate ledgers on one file stand in for separate bot processes
+    ledgers = [HoldLedger(path, 300, 60) for _ in range(4)]
+    barrier = threading.Barrier(16)
+    results = []
+
+    def contend(index):
+        barrier.wait()
+        results.append(ledgers[index % 4].acquire("Ana Souza", START, f"user{index}"))
+
+    threads = [threading.Thread(target=contend, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+
+
+def test_hold_lifecycle(isolated_hold_ledger):
+    ledger = isolated_hold_ledger
+    assert ledger.acquire("Ana Souza", START, "alice")
+    # Re-acquiring extends the owner's hold; names are case-insensitive
+    assert ledger.acquire("ana souza", START, "alice")
+    assert not ledger.acquire("Ana Souza", START, "bob")
+    assert ledger.taken(exclude_owner="alice") == set()
+    assert ledger.taken(exclude_owner="bob") == {("ana souza", int(START.timestamp()))}
+
+    assert ledger.release("Ana Souza", START, "alice")
+    assert ledger.acquire("Ana Souza", START, "bob")
+    assert ledger.commit("Ana Souza", START, "bob", "evt1")
+    # A booked slot cannot be held again, not even by its owner
+    assert not ledger.acquire("Ana Souza", START, "bob")
+    assert not ledger.release("Ana Souza", START, "bob")
+
+
+def test_expired_hold_is_free(isolated_hold_ledger):
+    ledger = isolated_hold_ledger
+    with patch("app.holds.time.time", return_value=1000.0):
+        assert ledger.acquire("Ana Souza", START, "alice", ttl_seconds=10)
+    with patch("app.holds.time.time", return_value=1011.0):
+        assert ledger.taken() == set()
+        assert ledger.acquire("Ana Souza", START, "bob")
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.memo import ToolCache, memoize, tool_cache, tool_turn
+
+
+def test_memoize_turn_scope_normalizes_arguments():
+    calls = []
+
+    @memoize("turn")
+    async def lookup(service_name: str) -> list:
+        calls.append(service_name)
+        return [service_name]
+
+    async def run():
+        tool_cache.clear()
+        with tool_turn("turn-1"):
+            await lookup("Fisioterapia")
+            await lookup("  fisioterápia ")
+        with tool_turn("turn-2"):
+            await lookup("Fisioterapia")
+        # Without an active turn nothing is cached
+        await lookup("Fisioterapia")
+        await lookup("Fisioterapia")
+
+    asyncio.run(run())
+    assert len(calls) == 4
+    assert tool_cache.stats()["lookup"]["hits"] == 1
+
+
+def test_tool_cache_invalidate_current_turn():
+    cache = ToolCache()
+    with tool_turn("turn-1"):
+        store = cache._store("turn", create=True)
+        store[("get_available_slots", ("rolfing",), (), None)] = []
+        store[("other", (), (), None)] = []
+        assert cache.invalidate("turn", lambda key: key[0] == "get_available_slots") == 1
+        assert list(cache._store("turn")) == [("other", (), (), None)]
+    assert cache.invalidate("turn", lambda key: True) == 0
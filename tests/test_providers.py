@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from app.providers import Provider
+
+
+def test_provider_creates_value_once_across_threads():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    provider = Provider("test client", factory)
+    assert not provider.initialized
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_provider_override_and_reset():
+    provider = Provider("test client", lambda: "real")
+    provider.override("fake")
+    assert provider.get() == "fake"
+    provider.reset()
+    assert provider.get() == "real"
+
+
+def test_importing_graph_does_not_touch_google_or_credentials():
+    env = {**os.environ, "GOOGLE_CREDENTIALS_FILE": "/nonexistent/credentials.json", "LLM_API_KEY": "x"}
+    code = (
+        "import sys, app.graph; "
+        "loaded = [m for m in sys.modules if m.startswith(('google', 'googleapiclient', 'httplib2', 'langchain.chat_models'))]; "
+        "print(loaded)"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from app.resilience import CircuitBreaker, CircuitOpenError, ahedged, call_hedged, call_with_retry
+
+
+class Flaky(Exception):
+    pass
+
+
+def test_call_with_retry_retries_only_retryable_errors():
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Flaky()
+        return "ok"
+
+    assert call_with_retry(func, "test", lambda e: isinstance(e, Flaky), attempts=3, base_delay=0) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(ValueError):
+        call_with_retry(lambda: calls.append(1) or int("x"), "test", lambda e: isinstance(e, Flaky), attempts=3, base_delay=0)
+    assert len(calls) == 1
+
+
+def test_circuit_breaker_fails_fast_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise Flaky()
+
+    with patch("app.resilience.time.monotonic", return_value=100.0):
+        with pytest.raises(Flaky):
+            call_with_retry(failing, "test", lambda e: True, attempts=5, breaker=breaker, base_delay=0)
+        # The second failure opened the circuit, so the remaining attempts were never made
+        assert len(calls) == 2 and breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            call_with_retry(failing, "test", lambda e: True, attempts=5, breaker=breaker, base_delay=0)
+        assert len(calls) == 2
+
+    # After reset_timeout a single trial call closes the circuit again
+    with patch("app.resilience.time.monotonic", return_value=131.0):
+        assert call_with_retry(lambda: "ok", "test", lambda e: True, attempts=1, breaker=breaker) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_ahedged_returns_the_faster_call():
+    delays = iter([1.0, 0.01])
+
+    async def request():
+        delay = next(delays)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        result = await ahedged(request, "test", delay=0.02)
+        return result, asyncio.get_running_loop().time() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result == 0.01
+    assert elapsed < 0.5
+
+
+def test_ahedged_prefers_a_success_finishing_with_a_failure():
+    async def run():
+        release = asyncio.Event()
+
+        async def original():
+            await release.wait()
+            raise Flaky()
+
+        async def hedge():
+            await release.wait()
+            return "ok"
+
+        # Both calls complete in the same loop iteration
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        return await ahedged(original, "test", delay=0.01, hedge=hedge)
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_call_hedged_raises_only_when_every_call_failed():
+    calls = []
+
+    def request():
+        calls.append(1)
+        time.sleep(0.05)
+        raise Flaky()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(Flaky):
+            call_hedged(request, "test", delay=0.01, executor=executor)
+    assert len(calls) == 2
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from app.router import Intent, classify, format_slots
+from app.services import Services
+
+CONFIG_FILE = Path(__file__).parent / "mock_services.yaml"
+
+
+def test_classify_list_services_in_each_language():
+    services = Services(config_path=str(CONFIG_FILE))
+    assert classify("Quais serviços vocês têm?", services) == Intent("list_services", "pt")
+    assert classify("¿Qué servicios ofrecen?", services) == Intent("list_services", "es")
+    assert classify("What services do you offer?", services) == Intent("list_services", "en")
+
+
+def test_classify_slots_with_service_and_day():
+    services = Services(config_path=str(CONFIG_FILE))
+    intent = classify("horários de Fisioterapia na quarta", services)
+    assert intent == Intent("get_available_slots", "pt", service_name="Fisioterapia", day="quarta-feira")
+    assert classify("disponibilidad de acupuntura el miércoles", services).day == "miércoles"
+
+
+def test_classify_falls_back_when_unsure():
+    services = Services(config_path=str(CONFIG_FILE))
+    # Booking requests and unknown services go to the model
+    assert classify("quero agendar fisioterapia na quarta às 10:00", services) is None
+    assert classify("horários de massagem", services) is None
+    assert classify("olá, tudo bem?", services) is None
+
+
+def test_format_slots_filters_by_day():
+    intent = Intent("get_available_slots", "pt", service_name="Fisioterapia", day="quarta-feira")
+    slots = [
+        {"professional": "Ana Souza", "day": "segunda-feira", "slot": "09:00-10:00"},
+        {"professional": "Ana Souza", "day": "quarta-feira", "slot": "10:00-11:00"},
+        {"professional": "Ana Souza", "day": "quarta-feira", "slot": "11:00-12:00"},
+    ]
+    assert format_slots(intent, slots) == "Horários disponíveis para Fisioterapia na quarta-feira:\n- Ana Souza: 10:00-11:00, 11:00-12:00"
@@ -1,5 +1,8 @@
+import os
+import time
 from unittest.mock import patch
-from app.services import Services
+from app.calendar import CalendarError
+from app.services import Services, ServiceCatalog
 from pathlib import Path
 
 CONFIG_FILE = Path(__file__).parent / "mock_services.yaml"
@@ -20,25 +23,25 @@ def test_service_basic_getters():
     assert service.get_professionals()[0]["name"] == "Ana Souza"
 
 
-@patch("app.services.is_slot_available", return_value=True)
-def test_service_get_available_professionals(mock_is_slot_available):
+@patch("app.availability.get_events", return_value=[])
+def test_service_get_available_professionals(mock_get_events):
     services = Services(config_path=str(CONFIG_FILE))
     service = services.get_by_name("fisioterapia")
     result = service.get_available_professionals("quarta-feira", "10:00")
     assert "Ana Souza" in result
 
 
-@patch("app.services.is_slot_available", return_value=True)
-def test_service_get_available_slots(mock_is_slot_available):
+@patch("app.availability.get_events", return_value=[])
+def test_service_get_available_slots(mock_get_events):
     services = Services(config_path=str(CONFIG_FILE))
     service = services.get_by_name("fisioterapia")
     slots = service.get_available_slots()
     assert any(slot["professional"] == "Ana Souza" for slot in slots)
 
 
-@patch("app.services.is_slot_available", return_value=True)
+@patch("app.availability.get_events", return_value=[])
 @patch("app.services.create_event", return_value="mock_event_id")
-def test_service_schedule_success(mock_create_event, mock_is_slot_available):
+def test_service_schedule_success(mock_create_event, mock_get_events):
     services = Services(config_path=str(CONFIG_FILE))
     service = services.get_by_name("fisioterapia")
     result = service.schedule("Juan Perez", "quarta-feira", "10:00")
@@ -47,4 +50,198 @@ def test_service_schedule_success(mock_create_event, mock_is_slot_available):
     mock_create_event.assert_called_once()
 
 
+@patch("app.availability.get_events", return_value=[])
+def test_service_get_available_slots_single_calendar_fetch(mock_get_events):
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    service.get_available_slots()
+    mock_get_events.assert_called_once()
+
+
+def test_service_compiled_schedule():
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # 09:00-12:00 and 14:00-17:00 on Monday plus 10:00-12:00 on Wednesday, in 60 minute steps
+    assert len(service._slots_by_professional["ana souza"]) == 8
+    assert service._professionals_by_start[(2, 11 * 60)] == ["Ana Souza"]
+
+
+@patch("app.availability.get_events", return_value=[])
+def test_service_get_available_professionals_inner_slot(mock_get_events):
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    assert service.get_available_professionals("quarta-feira", "11:00") == ["Ana Souza"]
+    assert service.get_available_professionals("quarta-feira", "13:00") == []
+    assert service.get_available_professionals("quarta-feira", "invalid") == []
+
+
+@patch("app.availability.get_events", return_value=[])
+@patch("app.services.create_event", return_value="mock_event_id")
+def test_service_rejects_end_of_day_start(mock_create_event, mock_get_events):
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # "24:00" only makes sense as the end of a slot
+    assert service.get_available_professionals("quarta-feira", "24:00") == []
+    assert service.get_available_professionals("2030-01-09", "24:00") == []
+    assert service.schedule("Juan Perez", "quarta-feira", "24:00")["status"] == "no_availability"
+    mock_create_event.assert_not_called()
+
+
+def test_service_catalog_shared_and_hot_reloaded(tmp_path):
+    config_file = tmp_path / "services.yaml"
+    config_file.write_text(CONFIG_FILE.read_text())
+    catalog = ServiceCatalog(str(config_file), check_interval=0)
+    services = catalog.get()
+    assert catalog.get() is services
+
+    config_file.write_text("services:\n  - name: Yoga\n    duration: 60\n")
+    os.utime(config_file, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    reloaded = catalog.get()
+    assert reloaded is not services
+    assert [service.get_name() for service in reloaded.get_all()] == ["Yoga"]
+    # Readers holding the previous catalog are unaffected
+    assert services.get_by_name("fisioterapia") is not None
+
+
+def test_services_get_by_name_tiers(tmp_path):
+    config_file = tmp_path / "services.yaml"
+    config_file.write_text(
+        "services:\n"
+        "  - name: Fisioterapia\n    aliases: [Physiotherapy]\n    duration: 60\n"
+        "  - name: Terapia Ocupacional\n    duration: 60\n"
+        "  - name: Terapia Floral\n    duration: 60\n"
+    )
+    services = Services(config_path=str(config_file))
+    assert services.get_by_name("PHYSIOTHERAPY").get_name() == "Fisioterapia"
+    assert services.get_by_name("quero fisioterapia amanhã").get_name() == "Fisioterapia"
+    assert services.get_by_name("terapia oc").get_name() == "Terapia Ocupacional"
+    assert services.get_by_name("fisiotrapia").get_name() == "Fisioterapia"
+    # Two equally good prefix matches are not silently resolved
+    assert services.get_by_name("terapia") is None
+    assert set(services.suggest("terapia")) >= {"Terapia Ocupacional", "Terapia Floral"}
+    assert services.get_by_name("massagem") is None
+
+
+@patch("app.services.create_events", side_effect=lambda items: [("evt1", None), (None, "backend error")][:len(items)])
+@patch("app.availability.get_events")
+def test_service_schedule_many(mock_get_events, mock_create_events):
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # 2030-01-07 is a Monday; 10:00 is already taken
+    mock_get_events.return_value = [{"start": {"dateTime": "2030-01-07T10:00:00-03:00"}, "end": {"dateTime": "2030-01-07T11:00:00-03:00"}}]
+    results = service.schedule_many([
+        {"user_name": "Juan", "day": "2030-01-07", "time": "09:00"},
+        {"user_name": "Maria", "day": "2030-01-07", "time": "09:00"},
+        {"user_name": "Luis", "day": "2030-01-07", "time": "10:00"},
+        {"user_name": "Rosa", "day": "2030-01-14", "time": "14:00", "professional_name": "Ana Souza"},
+        {"user_name": "Ivo", "day": "ontem", "time": "09:00"},
+        {"user_name": "Eva", "day": "2020-01-06", "time": "09:00"},
+        {"user_name": "Caio", "day": "2030-01-07", "time": "03:00", "professional_name": "Ninguém"},
+        {"user_name": "Lia", "day": "2030-01-14", "time": "09:00", "professional_name": "Pedro Lima"},
+    ])
+
+    assert [r["status"] for r in results] == ["success", "no_availability", "no_availability", "error", "error", "error", "no_availability", "no_availability"]
+    assert results[0]["event_id"] == "evt1"
+    # One calendar fetch for the whole import and one bulk insert of the accepted requests
+    mock_get_events.assert_called_once()
+    (inserted,), _ = mock_create_events.call_args
+    assert [(item["user_name"], item["professional_name"]) for item in inserted] == [("Juan", "Ana Souza"), ("Rosa", "Ana Souza")]
+
+
+@patch("app.availability.get_events")
+def test_find_earliest_slots_over_weeks(mock_get_events):
+    import pendulum
+
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # Monday 2030-01-07 at 09:30, with 10:00 already booked
+    mock_get_events.return_value = [{"start": {"dateTime": "2030-01-07T10:00:00-03:00"}, "end": {"dateTime": "2030-01-07T11:00:00-03:00"}}]
+    with patch("app.services.pendulum.now", return_value=pendulum.datetime(2030, 1, 7, 9, 30, tz="America/Sao_Paulo")):
+        first_page = service.find_earliest_slots(limit=3)
+        second_page = service.find_earliest_slots(limit=2, offset=3)
+        one_week = service.find_earliest_slots(limit=100, horizon_weeks=1)
+        catalog = services.find_earliest_slots(limit=2)
+
+    assert [(s["date"], s["slot"]) for s in first_page] == [("2030-01-07", "11:00-12:00"), ("2030-01-07", "14:00-15:00"), ("2030-01-07", "15:00-16:00")]
+    assert first_page[0]["professionals"] == ["Ana Souza"] and first_page[0]["day"] == "segunda-feira"
+    assert [(s["date"], s["slot"], s["professionals"]) for s in second_page] == [
+        ("2030-01-07", "16:00-17:00", ["Ana Souza"]), ("2030-01-08", "10:00-11:00", ["Pedro Lima"]),
+    ]
+    # Monday 11:00-16:00, Tuesday's four and Wednesday's two slots
+    assert len(one_week) == 10
+    # Ties on the start time keep catalog order
+    assert [(s["service"], s["slot"]) for s in catalog] == [("Fisioterapia", "11:00-12:00"), ("Rolfing", "11:00-12:00")]
+
+
+@patch("app.availability.get_events", return_value=[])
+def test_find_earliest_slots_skips_slots_held_by_others(mock_get_events, isolated_hold_ledger):
+    import pendulum
+
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # Monday 2030-01-07 at 10:30: another conversation holds Ana Souza at 11:00
+    assert isolated_hold_ledger.acquire("Ana Souza", pendulum.datetime(2030, 1, 7, 11, tz="America/Sao_Paulo"), "chat-2")
+    with patch("app.services.pendulum.now", return_value=pendulum.datetime(2030, 1, 7, 10, 30, tz="America/Sao_Paulo")):
+        others = service.find_earliest_slots(limit=2, owner="chat-1")
+        holder = service.find_earliest_slots(limit=2, owner="chat-2")
+        catalog = services.find_earliest_slots(limit=2, owner="chat-1")
+
+    # The page is still full, starting after the held slot
+    assert [s["slot"] for s in others] == ["14:00-15:00", "15:00-16:00"]
+    assert [s["slot"] for s in holder] == ["11:00-12:00", "14:00-15:00"]
+    assert [(s["service"], s["slot"]) for s in catalog] == [("Rolfing", "11:00-12:00"), ("Fisioterapia", "14:00-15:00")]
+
+
+@patch("app.availability.get_events", return_value=[])
+@patch("app.services.create_event", return_value="mock_event_id")
+def test_service_schedule_respects_holds(mock_create_event, mock_get_events, isolated_hold_ledger):
+    import pendulum
+
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # Listings cover the next occurrence of each weekday
+    monday = pendulum.now("America/Sao_Paulo").next(pendulum.MONDAY).to_date_string()
+    assert service.hold(monday, "10:00", owner="chat-1") == "Ana Souza"
+
+    # Another conversation neither sees nor books the held slot, and the calendar is not asked
+    assert not any(s["day"] == "segunda-feira" and s["slot"].startswith("10:00") for s in service.get_slots_for_professional("Ana Souza", owner="chat-2"))
+    mock_get_events.reset_mock()
+    result = service.schedule("Maria", monday, "10:00", owner="chat-2")
+    assert result["status"] == "no_availability"
+    mock_get_events.assert_not_called()
+    mock_create_event.assert_not_called()
+
+    # The holder books it, after which the slot stays taken for everyone else
+    assert service.schedule("Juan", monday, "10:00", owner="chat-1")["status"] == "success"
+    assert service.hold(monday, "10:00", owner="chat-2") is None
+
+
+@patch("app.availability.get_events", return_value=[])
+@patch("app.services.create_event", side_effect=CalendarError("Não foi possível criar o evento na agenda"))
+def test_service_schedule_reports_calendar_failures(mock_create_event, mock_get_events, isolated_hold_ledger):
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    result = service.schedule("Juan", "2030-01-07", "10:00", owner="chat-1")
+    assert result["status"] == "error"
+    # The hold is released so the slot can still be booked
+    assert isolated_hold_ledger.taken() == set()
+
+
+@patch("app.availability.get_events")
+@patch("app.services.create_event", return_value="mock_event_id")
+def test_service_hold_is_validated_and_booked(mock_create_event, mock_get_events, isolated_hold_ledger):
+    services = Services(config_path=str(CONFIG_FILE))
+    service = services.get_by_name("fisioterapia")
+    # Nobody works at 03:00, unknown professionals are not held and busy slots are not held
+    mock_get_events.return_value = []
+    assert service.hold("2030-01-07", "03:00", owner="chat-1") is None
+    assert service.hold("2030-01-07", "10:00", owner="chat-1", professional_name="Ninguém") is None
+    mock_get_events.return_value = [{"start": {"dateTime": "2030-01-07T10:00:00-03:00"}, "end": {"dateTime": "2030-01-07T11:00:00-03:00"}}]
+    assert service.hold("2030-01-07", "10:00", owner="chat-1") is None
+    assert isolated_hold_ledger.taken() == set()
 
+    mock_get_events.return_value = []
+    professional = service.hold("2030-01-07", "10:00", owner="chat-1", professional_name="ana souza")
+    assert professional == "Ana Souza"
+    assert service.schedule("Juan", "2030-01-07", "10:00", professional, owner="chat-1")["status"] == "success"
+    assert mock_create_event.call_args.args[2] == "Ana Souza"
@@ -0,0 +1,39 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.streaming import FALLBACK_REPLY, StreamUpdate, stream_reply
+
+
+class FakeAgent:
+    """Replays a fixed list of astream_events events."""
+    def __init__(self, events):
+        self.events = events
+
+    async def astream_events(self, input, config=None, version="v2"):
+        for event in self.events:
+            yield event
+
+
+def collect(agent) -> list:
+    async def run():
+        return [update async for update in stream_reply(agent, {"messages": []})]
+    return asyncio.run(run())
+
+
+def test_stream_reply_yields_status_tokens_and_final():
+    agent = FakeAgent([
+        {"event": "on_tool_start", "name": "get_available_slots", "metadata": {}, "parent_ids": ["root"], "data": {}},
+        {"event": "on_chat_model_stream", "metadata": {"langgraph_node": "manage_context"}, "parent_ids": ["root"], "data": {"chunk": AIMessageChunk(content="resumo")}},
+        {"event": "on_chat_model_stream", "metadata": {"langgraph_node": "call_model"}, "parent_ids": ["root"], "data": {"chunk": AIMessageChunk(content="Olá")}},
+        {"event": "on_chain_end", "name": "Nexia", "metadata": {}, "parent_ids": [], "data": {"output": {"messages": [AIMessage(content="Olá!")]}}},
+    ])
+    assert collect(agent) == [
+        StreamUpdate("status", "Verificando disponibilidade…"),
+        StreamUpdate("token", "Olá"),
+        StreamUpdate("final", "Olá!"),
+    ]
+
+
+def test_stream_reply_falls_back_without_answer():
+    assert collect(FakeAgent([])) == [StreamUpdate("final", FALLBACK_REPLY)]
@@ -0,0 +1,91 @@
+import asyncio
+import urllib.request
+
+import pytest
+
+from app import telemetry
+from app.telemetry import Counter, Histogram, recent_spans, render_prometheus, span
+from app.tool_runner import ToolRunner
+
+
+@pytest.fixture
+def enabled():
+    telemetry.configure(True)
+    telemetry.registry.clear()
+    recent_spans.clear()
+    yield
+    telemetry.configure(False)
+
+
+def test_disabled_telemetry_is_a_noop():
+    telemetry.configure(False)
+    recent_spans.clear()
+    with span("call_model", model="m") as current:
+        current.set_attribute("input_tokens", 10)
+    telemetry.TOOL_CALLS.inc(tool="x", status="ok")
+    assert not recent_spans
+    assert telemetry.TOOL_CALLS.value(tool="x", status="ok") == 0
+
+
+def test_spans_nest_and_record_errors(enabled):
+    with span("call_model") as parent:
+        with span("tool", tool="list_services"):
+            pass
+    with pytest.raises(ValueError):
+        with span("calendar.get_events"):
+            raise ValueError("boom")
+
+    child, finished_parent, failed = recent_spans
+    assert child.parent_id == parent.span_id and child.trace_id == parent.trace_id
+    assert finished_parent is parent and parent.status == "ok"
+    assert failed.status == "error" and failed.attributes["error"] == "ValueError"
+    assert telemetry.SPAN_DURATION.count(span="tool", status="ok") == 1
+
+
+def test_prometheus_text_format(enabled):
+    counter = Counter("test_requests_total", "Test requests.", ("route",))
+    histogram = Histogram("test_latency_seconds", "Test latency.", buckets=(0.1, 1.0))
+    counter.inc(route='a"b')
+    counter.inc(2, route='a"b')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    text = render_prometheus()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="a\\"b"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_latency_seconds_count 2" in text
+
+
+def test_tool_runner_reports_spans_and_counters(enabled):
+    async def lookup(service_name: str) -> list:
+        """Lookup."""
+        return ["09:00", "10:00"]
+
+    async def slots(service_name: str) -> dict:
+        """Slots."""
+        return {"slots": {"Ana Souza": {"segunda-feira": ["09:00"]}}, "total": 7, "offset": 0, "has_more": True}
+
+    runner = ToolRunner([lookup, slots])
+    asyncio.run(runner.run([
+        {"name": "lookup", "args": {"service_name": "Psicologia"}, "id": "1"},
+        {"name": "slots", "args": {"service_name": "Psicologia"}, "id": "2"},
+    ], {}, 1.0, {}))
+
+    lookup_span, slots_span = sorted((s for s in recent_spans if s.name == "tool"), key=lambda s: s.attributes["tool"])
+    assert lookup_span.attributes == {"tool": "lookup", "service": "Psicologia", "results": 2}
+    # Paginated payloads report their total, not the size of the grouped page
+    assert slots_span.attributes == {"tool": "slots", "service": "Psicologia", "results": 7}
+    assert telemetry.TOOL_CALLS.value(tool="lookup", status="ok") == 1
+
+
+def test_metrics_endpoint(enabled, monkeypatch):
+    monkeypatch.setattr(telemetry, "_server", None)
+    server = telemetry.start_metrics_server(port=0)
+    try:
+        telemetry.CALENDAR_CACHE.inc(result="hit")
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert 'nexia_calendar_cache_total{result="hit"} 1' in response.read().decode()
+    finally:
+        server.shutdown()
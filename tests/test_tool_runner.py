@@ -0,0 +1,48 @@
+import asyncio
+import json
+import time
+
+from app.tool_runner import ToolRunner, get_tool_latency_stats
+
+
+async def slow_lookup(service_name: str) -> list:
+    """Slow lookup."""
+    await asyncio.sleep(0.2)
+    return [service_name]
+
+
+async def broken_lookup() -> list:
+    """Broken lookup."""
+    raise RuntimeError("calendar down")
+
+
+def run(tool_calls, timeouts=None):
+    runner = ToolRunner([slow_lookup, broken_lookup])
+    return asyncio.run(runner.run(tool_calls, {}, default_timeout=1.0, timeouts=timeouts or {}))
+
+
+def test_tool_runner_runs_calls_concurrently():
+    calls = [{"name": "slow_lookup", "args": {"service_name": name}, "id": name} for name in ("a", "b", "c")]
+    started = time.perf_counter()
+    messages = run(calls)
+    assert time.perf_counter() - started < 0.5
+    assert [json.loads(message.content) for message in messages] == [["a"], ["b"], ["c"]]
+    assert [message.tool_call_id for message in messages] == ["a", "b", "c"]
+    assert get_tool_latency_stats()["slow_lookup"]["count"] >= 3
+
+
+def test_tool_runner_reports_timeouts_and_errors():
+    messages = run(
+        [
+            {"name": "slow_lookup", "args": {"service_name": "a"}, "id": "1"},
+            {"name": "broken_lookup", "args": {}, "id": "2"},
+            {"name": "missing", "args": {}, "id": "3"},
+        ],
+        timeouts={"slow_lookup": 0.05},
+    )
+    contents = [json.loads(message.content) for message in messages]
+    assert contents[0]["status"] == "timeout"
+    assert contents[0]["timeout_seconds"] == 0.05
+    assert contents[1]["status"] == "error" and "calendar down" in contents[1]["message"]
+    assert contents[2]["status"] == "error"
+    assert all(message.status == "error" for message in messages)
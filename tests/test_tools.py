@@ -0,0 +1,85 @@
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pendulum
+
+from app.memo import tool_cache
+from app.services import Services
+from app.tools import WRITE_TOOLS, get_available_slots, get_slots_for_professional, hold_slot, list_services, paginate_slots
+
+CONFIG_FILE = Path(__file__).parent / "mock_services.yaml"
+
+
+def _slot(professional, day, date, start):
+    return {"professional": professional, "day": day, "date": date, "slot": f"{start}-{int(start[:2]) + 1:02d}:00"}
+
+
+SLOTS = [
+    _slot("Pedro Lima", "terça-feira", "2030-01-08", "10:00"),
+    _slot("Ana Souza", "segunda-feira", "2030-01-07", "14:00"),
+    _slot("Ana Souza", "segunda-feira", "2030-01-07", "09:00"),
+    _slot("Ana Souza", "terça-feira", "2030-01-08", "10:00"),
+    _slot("Ana Souza", "quarta-feira", "2030-01-09", "11:00"),
+]
+
+
+def test_paginate_slots_compact_pages():
+    first = paginate_slots(SLOTS, limit=3)
+    assert first == {
+        "slots": {"Ana Souza": {"segunda-feira": ["09:00", "14:00"], "terça-feira": ["10:00"]}},
+        "total": 5, "offset": 0, "has_more": True, "next_offset": 3,
+    }
+    rest = paginate_slots(SLOTS, limit=3, offset=first["next_offset"])
+    assert rest["slots"] == {"Pedro Lima": {"terça-feira": ["10:00"]}, "Ana Souza": {"quarta-feira": ["11:00"]}}
+    assert not rest["has_more"] and "next_offset" not in rest
+    # Grouping keeps the payload smaller than the flat listing it replaces
+    assert len(json.dumps(paginate_slots(SLOTS, limit=None)["slots"])) < len(json.dumps(SLOTS))
+
+
+def test_paginate_slots_from_day():
+    with patch("app.tools.pendulum.now", return_value=pendulum.datetime(2030, 1, 6, 12, tz="America/Sao_Paulo")):
+        by_weekday = paginate_slots(SLOTS, limit=None, from_day="terça-feira", compact=False)
+    assert [slot["date"] for slot in by_weekday["slots"]] == ["2030-01-08", "2030-01-08", "2030-01-09"]
+    assert paginate_slots(SLOTS, limit=None, from_day="2030-01-09")["slots"] == {"Ana Souza": {"quarta-feira": ["11:00"]}}
+
+
+def test_list_services_cache_follows_catalog_version():
+    first, second = Services(config_path=str(CONFIG_FILE)), Services(config_path=str(CONFIG_FILE))
+    assert first.version != second.version
+    tool_cache.clear()
+    with patch("app.tools.Configuration.from_context") as from_context:
+        from_context.return_value = SimpleNamespace(services=first)
+        names = asyncio.run(list_services())
+        assert asyncio.run(list_services()) == names
+        assert tool_cache.stats()["list_services"]["hits"] == 1
+        # A replaced catalog misses and drops the entries of the old one
+        second.services = second.services[:1]
+        from_context.return_value = SimpleNamespace(services=second)
+        assert asyncio.run(list_services()) == names[:1]
+    assert [key[-1] for key in tool_cache._process] == [second.version]
+
+
+def test_slot_listings_report_unknown_services_as_errors():
+    services = Services(config_path=str(CONFIG_FILE))
+    with patch("app.tools.Configuration.from_context", return_value=SimpleNamespace(services=services)), \
+            patch("app.tools.run_in_calendar_pool") as run_in_calendar_pool:
+        listing = asyncio.run(get_available_slots("Yoga"))
+        by_professional = asyncio.run(get_slots_for_professional("Yoga", "Ana Souza"))
+    # An empty page would read as "no availability" to the model
+    assert listing == by_professional == {"status": "error", "message": "Serviço 'Yoga' não encontrado.", "suggestions": []}
+    run_in_calendar_pool.assert_not_called()
+
+
+def test_hold_slot_runs_to_completion():
+    services = Services(config_path=str(CONFIG_FILE))
+    with patch("app.tools.Configuration.from_context", return_value=SimpleNamespace(services=services)), \
+            patch("app.tools._owner", return_value="chat-1"), \
+            patch("app.tools.run_in_calendar_pool", new=AsyncMock(return_value="Ana Souza")) as run_in_calendar_pool:
+        result = asyncio.run(hold_slot("Fisioterapia", "segunda-feira", "10:00"))
+    assert result["status"] == "held" and result["professional"] == "Ana Souza"
+    # Neither the tool runner nor the calendar pool may cut off a hold that is still being taken
+    assert "hold_slot" in WRITE_TOOLS
+    assert run_in_calendar_pool.call_args.kwargs["write"] is True
@@ -0,0 +1,23 @@
+from unittest.mock import MagicMock, patch
+
+from app.utils import load_bound_chat_model
+
+
+def tool_a():
+    """Tool A."""
+
+
+def tool_b():
+    """Tool B."""
+
+
+@patch("app.utils.load_chat_model")
+def test_load_bound_chat_model_reuses_clients(mock_load_chat_model):
+    mock_load_chat_model.side_effect = lambda *args, **kwargs: MagicMock()
+    load_bound_chat_model.cache_clear()
+    first = load_bound_chat_model("openai/gpt-4o", "key", (tool_a, tool_b))
+    assert load_bound_chat_model("openai/gpt-4o", "key", (tool_a, tool_b)) is first
+    assert load_bound_chat_model("openai/gpt-4o", "other-key", (tool_a, tool_b)) is not first
+    assert load_bound_chat_model("openai/gpt-4o", "key", (tool_a,)) is not first
+    assert mock_load_chat_model.call_count == 3
+    load_bound_chat_model.cache_clear()